@@ -0,0 +1,38 @@
+"""Token-budget packing of recent messages into agent prompts"""
+
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence
+
+# Rough characters-per-token ratio for English text under Gemini's tokenizer
+CHARS_PER_TOKEN = 4
+
+# Default prompt budget for the recent-conversation block
+RECENT_TOKEN_BUDGET = 1500
+
+@lru_cache(maxsize=1024)
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a message body"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def pack(messages: Sequence[Dict[str, Any]], token_budget: int = RECENT_TOKEN_BUDGET,
+         limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Select the newest messages that fit within ``token_budget``
+
+    Messages are taken newest-first until the next one would exceed the
+    budget (or ``limit`` messages are taken), then returned in chronological
+    order. The newest message is always kept so a single long turn is not
+    dropped entirely.
+    """
+    packed = []
+    used = 0
+    for msg in reversed(messages):
+        if limit is not None and len(packed) >= limit:
+            break
+        cost = estimate_tokens(str(msg.get("content", "")))
+        if packed and used + cost > token_budget:
+            break
+        packed.append(msg)
+        used += cost
+    packed.reverse()
+    return packed
@@ -0,0 +1,31 @@
+"""Similarity kernels for embedding-based memory lookup"""
+
+from typing import Tuple
+import numpy as np
+from numba import njit
+
+def normalize(vector) -> np.ndarray:
+    """Return a unit-length float32 copy so cosine similarity reduces to a dot product"""
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+@njit(cache=True, fastmath=True)
+def topk_cosine(query: np.ndarray, mat: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k rows of ``mat`` by cosine similarity to ``query``
+
+    Both inputs must be pre-normalized float32, so the score is a plain dot
+    product. Returns (indices, scores) ordered best first.
+    """
+    n, dim = mat.shape
+    scores = np.empty(n, dtype=np.float32)
+    for i in range(n):
+        acc = np.float32(0.0)
+        for j in range(dim):
+            acc += mat[i, j] * query[j]
+        scores[i] = acc
+
+    k = min(k, n)
+    order = np.argsort(-scores)[:k]
+    return order, scores[order]
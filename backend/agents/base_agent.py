@@ -1,12 +1,33 @@
 """Base agent class for all debate agents"""
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Callable, Optional, Tuple, Type
+from pydantic import BaseModel
+from dataclasses import fields
 from enum import Enum
+from string import Template
+import json
 import logging
+from agents._packing import RECENT_TOKEN_BUDGET, pack
+from models.agent_models import PROMPT_PREFIX_FIELDS, AgentResult, ContextView
+from services.cache_service import SemanticCache
+from utils.config import Config
 
 logger = logging.getLogger(__name__)
 
+# Shared across agents; entries are namespaced by role and context
+_response_cache = SemanticCache(
+    Config.EMBEDDING_MODEL,
+    threshold=Config.SEMANTIC_CACHE_THRESHOLD,
+    max_namespaces=Config.SEMANTIC_CACHE_SIZE
+)
+
+# Context keys that differ between sessions without changing the prompt's meaning
+_VOLATILE_CONTEXT_KEYS = frozenset({"session_id", "timestamp"})
+
+# Template placeholders filled straight from the shared ContextView
+_VIEW_SLOTS = frozenset(f.name for f in fields(ContextView))
+
 class AgentRole(str, Enum):
     CONTROLLER = "controller"
     MODERATOR = "moderator"
@@ -20,14 +41,35 @@ class AgentRole(str, Enum):
 class BaseAgent(ABC):
     """Abstract base class for all debate agents"""
     
+    # Context projection sent to the LLM with each call; subclasses narrow it
+    # to the fields their prompts actually consume
+    CONTEXT_FIELDS: Tuple[str, ...] = ("topic", "user_position", "ai_position", "current_round", "phase")
+    RECENT_MESSAGE_LIMIT: int = 5
+    RECENT_MESSAGE_ROLE: Optional[str] = None
+    # Approximate token budget for recent messages, filled newest-first
+    RECENT_TOKEN_BUDGET: int = RECENT_TOKEN_BUDGET
+    # Main prompt template; compiled into self._build_prompt at construction
+    PROMPT_TPL: Optional[Template] = None
+    # Whether identical requests from this agent may reuse an earlier
+    # completion from LLMService's response cache
+    REUSE_RESPONSES: bool = False
+    
     def __init__(self, role: AgentRole, llm_service=None, memory_service=None):
         self.role = role
         self.llm_service = llm_service
         self.memory_service = memory_service
-        self.agent_id = f"{role.value}_{id(self)}"
+        
+        # Role prompts are constant per agent, so build them once
+        self._system_prompt = self._get_role_prompt()
+        self._build_prompt = self._compile_builder() if self.PROMPT_TPL is not None else None
+    
+    @property
+    def agent_id(self) -> str:
+        """Unique identifier for this agent instance, built on demand"""
+        return f"{self.role.value}_{id(self)}"
         
     @abstractmethod
-    async def execute(self, task: str, context: Dict[str, Any]) -> Dict[str, Any]:
+    async def execute(self, task: str, context: Dict[str, Any]) -> AgentResult:
         """
         Execute the agent's primary function
         
@@ -36,52 +78,183 @@ class BaseAgent(ABC):
             context: Current debate context and state
             
         Returns:
-            Dict containing the agent's response and metadata
+            AgentResult with the agent's response and metadata
         """
         pass
     
     def get_system_prompt(self) -> str:
         """Get the system prompt for this agent"""
-        return self._get_role_prompt()
+        return self._system_prompt
     
     @abstractmethod
     def _get_role_prompt(self) -> str:
         """Get the role-specific system prompt"""
         pass
     
-    async def _call_llm(self, prompt: str, context: Dict[str, Any] = None) -> str:
-        """Helper method to call LLM service"""
+    async def _call_llm(self, prompt: str, context: Dict[str, Any] = None,
+                        use_cache: bool = True) -> Tuple[str, bool]:
+        """
+        Helper method to call LLM service
+        
+        Returns the response text and whether it was served from the
+        semantic cache; pass the latter on to ``_format_response``.
+        Pass ``use_cache=False`` when repeated calls with the same prompt
+        must yield distinct responses (e.g. batch generation).
+        """
         if not self.llm_service:
             raise ValueError("LLM service not configured for agent")
             
-        system_prompt = self.get_system_prompt()
-        full_prompt = f"{system_prompt}\n\nContext: {context}\n\nTask: {prompt}"
+        cache_namespace = (self.role.value, self._normalize_context(context))
         
+        if use_cache:
+            cached = await _response_cache.get(cache_namespace, prompt)
+            if cached is not None:
+                return cached, True
+            
         try:
-            response = await self.llm_service.generate_response(full_prompt)
-            return response
+            response = await self.llm_service.generate_response(
+                prompt,
+                reuse_response=use_cache and self.REUSE_RESPONSES,
+                system=self._system_prompt,
+                cached_context=self._serialize_context(context)
+            )
+            if use_cache:
+                await _response_cache.set(cache_namespace, prompt, response)
+            return response, False
         except Exception as e:
-            logger.error(f"LLM call failed for agent {self.agent_id}: {e}")
+            logger.error("LLM call failed for agent %s_%d: %s", self.role.value, id(self), e)
             raise
     
-    def _extract_context_info(self, context: Dict[str, Any]) -> Dict[str, Any]:
-        """Extract relevant information from context"""
-        return {
-            "topic": context.get("topic", ""),
-            "user_position": context.get("user_position", ""),
-            "ai_position": context.get("ai_position", ""),
-            "current_round": context.get("current_round", 0),
-            "phase": context.get("phase", ""),
-            "recent_messages": context.get("recent_messages", [])
+    async def _call_llm_structured(self, prompt: str, schema: Type[BaseModel],
+                                   context: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Helper method to call LLM service for a schema-constrained response"""
+        if not self.llm_service:
+            raise ValueError("LLM service not configured for agent")
+        
+        try:
+            return await self.llm_service.generate_structured(
+                prompt,
+                schema,
+                system=self._system_prompt,
+                cached_context=self._serialize_context(context)
+            )
+        except Exception as e:
+            logger.error("Structured LLM call failed for agent %s_%d: %s", self.role.value, id(self), e)
+            raise
+    
+    async def _embed(self, text: str):
+        """Unit-normalized embedding of text from the shared encoder, or None if unavailable"""
+        return await _response_cache.embed(text)
+    
+    def _compile_builder(self, template: Optional[Template] = None,
+                         view_slots: bool = True) -> Callable[..., str]:
+        """
+        Specialize a prompt template into a builder function
+        
+        The template is split once into literal chunks and slot getters, so
+        building a prompt is a single join. The builder is called as
+        ``build(view, task, **extra)``: placeholders named after ContextView
+        fields read from ``view`` (unless ``view_slots`` is False), ``$task``
+        takes ``task`` and anything else must be passed in ``extra``.
+        """
+        template = template or self.PROMPT_TPL
+        source = template.template
+        literals, getters = [], []
+        chunk, pos = [], 0
+        
+        for match in template.pattern.finditer(source):
+            chunk.append(source[pos:match.start()])
+            pos = match.end()
+            if match.group("escaped") is not None:
+                chunk.append(template.delimiter)
+                continue
+            name = match.group("named") or match.group("braced")
+            if name is None:
+                raise ValueError(f"Invalid placeholder in {self.role.value} prompt template")
+            literals.append("".join(chunk))
+            chunk = []
+            if name == "task":
+                getters.append(lambda view, task, extra: task)
+            elif view_slots and name in _VIEW_SLOTS:
+                getters.append(lambda view, task, extra, name=name: getattr(view, name))
+            else:
+                getters.append(lambda view, task, extra, name=name: extra[name])
+        
+        chunk.append(source[pos:])
+        tail = "".join(chunk)
+        literals = tuple(literals)
+        getters = tuple(getters)
+        
+        def build(view: Optional[ContextView], task: str = "", **extra: Any) -> str:
+            parts = []
+            for literal, get in zip(literals, getters):
+                parts.append(literal)
+                parts.append(str(get(view, task, extra)))
+            parts.append(tail)
+            return "".join(parts)
+        
+        return build
+    
+    def _context_view(self, context: Dict[str, Any]) -> ContextView:
+        """Shared view of the context, built here only if the controller did not"""
+        view = context.get("_view")
+        if view is None:
+            view = ContextView.from_context(context)
+        return view
+    
+    def _project_context(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Reduce the context to the fields and messages this agent's role uses"""
+        projected = {field: context.get(field, "") for field in self.CONTEXT_FIELDS}
+        
+        if self.RECENT_MESSAGE_LIMIT:
+            messages = context.get("recent_messages", [])
+            if self.RECENT_MESSAGE_ROLE:
+                messages = [msg for msg in messages if msg.get("role") == self.RECENT_MESSAGE_ROLE]
+            projected["recent_messages"] = pack(messages, self.RECENT_TOKEN_BUDGET, self.RECENT_MESSAGE_LIMIT)
+        
+        return projected
+    
+    def _serialize_context(self, context: Optional[Dict[str, Any]]) -> str:
+        """
+        Context block sent to the LLM
+        
+        The caller's shared prompt prefix comes first, when one is given, and
+        its fields are then left out of the compact, deterministic JSON of the
+        rest of the projected context.
+        """
+        if not context:
+            return ""
+        projected = self._project_context(context)
+        prefix = context.get("_prompt_prefix")
+        if prefix:
+            projected = {k: v for k, v in projected.items() if k not in PROMPT_PREFIX_FIELDS}
+        body = json.dumps(projected, sort_keys=True, separators=(",", ":"), default=str) if projected else ""
+        return "\n".join(part for part in (prefix, body) if part)
+    
+    def _normalize_context(self, context: Optional[Dict[str, Any]]) -> str:
+        """Deterministic string form of the context, used as a cache key"""
+        if not context:
+            return ""
+        # Underscore keys hold derived data such as the shared ContextView
+        stable = {
+            k: v for k, v in context.items()
+            if k not in _VOLATILE_CONTEXT_KEYS and not k.startswith("_")
         }
+        return json.dumps(stable, sort_keys=True, default=str)
     
     def _format_response(self, content: str, reasoning: str = "", 
-                        confidence: float = 0.8, metadata: Dict = None) -> Dict[str, Any]:
-        """Format agent response in standard format"""
-        return {
-            "agent_name": self.role.value,
-            "content": content,
-            "reasoning": reasoning,
-            "confidence": confidence,
-            "metadata": metadata or {}
-        }
\ No newline at end of file
+                        confidence: float = 0.8, metadata: Dict = None,
+                        cached: bool = False) -> AgentResult:
+        """Format agent response in standard format; ``cached`` as returned by _call_llm"""
+        if cached:
+            # Served from the semantic cache rather than a fresh generation
+            confidence = max(0.0, confidence - Config.SEMANTIC_CACHE_CONFIDENCE_PENALTY)
+            metadata = {**(metadata or {}), "cached": True}
+        
+        return AgentResult(
+            agent_name=self.role.value,
+            content=content,
+            reasoning=reasoning,
+            confidence=confidence,
+            metadata=metadata or {}
+        )
\ No newline at end of file
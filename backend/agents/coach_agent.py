@@ -2,7 +2,10 @@
 """Coach Agent - Provides strategic tips and guidance"""
 
 from typing import Dict, Any
+from string import Template
+from textwrap import dedent
 from agents.base_agent import BaseAgent, AgentRole
+from models.agent_models import AgentResult
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,31 +13,23 @@ logger = logging.getLogger(__name__)
 class CoachAgent(BaseAgent):
     """Provides strategic coaching and tips for better debating"""
     
-    def __init__(self, llm_service, memory_service=None):
-        super().__init__(AgentRole.COACH, llm_service, memory_service)
+    CONTEXT_FIELDS = ("topic", "user_position", "current_round", "phase")
+    RECENT_MESSAGE_LIMIT = 2
+    RECENT_MESSAGE_ROLE = "user"
     
-    async def execute(self, task: str, context: Dict[str, Any]) -> Dict[str, Any]:
-        """Provide coaching tips and strategic guidance"""
-        
-        context_info = self._extract_context_info(context)
-        recent_user_messages = [
-            msg for msg in context_info['recent_messages'] 
-            if msg.get('role') == 'user'
-        ]
-        
-        prompt = f"""
+    PROMPT_TPL = Template(dedent("""
         Provide strategic coaching advice based on the current debate situation.
         
         Context:
-        - Topic: {context_info['topic']}
-        - User Position: {context_info['user_position']}
-        - Current Round: {context_info['current_round']}
-        - Phase: {context_info['phase']}
+        - Topic: $topic
+        - User Position: $user_position
+        - Current Round: $current_round
+        - Phase: $phase
         
         User's Recent Arguments:
-        {recent_user_messages[-2:] if recent_user_messages else "No recent arguments"}
+        $recent_arguments
         
-        Task: {task}
+        Task: $task
         
         Provide 2-3 specific, actionable tips that would help improve their debating in this situation. Focus on:
         
@@ -48,10 +43,27 @@ class CoachAgent(BaseAgent):
         - "You could strengthen your argument by addressing the economic implications they raised"
         
         Keep tips practical, specific, and immediately applicable. Be encouraging and educational.
-        """
+    """))
+    
+    def __init__(self, llm_service, memory_service=None):
+        super().__init__(AgentRole.COACH, llm_service, memory_service)
+    
+    async def execute(self, task: str, context: Dict[str, Any]) -> AgentResult:
+        """Provide coaching tips and strategic guidance"""
+        
+        view = self._context_view(context)
+        recent_user_messages = [
+            msg for msg in view.recent_messages 
+            if msg.get('role') == 'user'
+        ]
+        
+        prompt = self._build_prompt(
+            view, task,
+            recent_arguments=recent_user_messages[-2:] if recent_user_messages else "No recent arguments"
+        )
         
         try:
-            coaching_tips = await self._call_llm(prompt, context)
+            coaching_tips, cached = await self._call_llm(prompt, context)
             
             return self._format_response(
                 content=coaching_tips,
@@ -59,9 +71,10 @@ class CoachAgent(BaseAgent):
                 confidence=0.85,
                 metadata={
                     "coaching_type": "strategic",
-                    "round": context_info['current_round'],
-                    "phase": context_info['phase']
-                }
+                    "round": view.current_round,
+                    "phase": view.phase
+                },
+                cached=cached
             )
             
         except Exception as e:
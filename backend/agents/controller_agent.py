@@ -1,26 +1,95 @@
 """Controller Agent - Orchestrates the entire debate flow"""
 
-from typing import Dict, Any, List
-import json
+from typing import Dict, Any, List, Tuple
+from string import Template
+from textwrap import dedent
 import asyncio
 from agents.base_agent import BaseAgent, AgentRole
+from models.agent_models import AgentResult, ContextView, ControllerDecision
 from models.debate_models import DebatePhase, MessageRole
+from utils.config import Config
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Bounds how many speculative agent calls may be in flight at once
+_SPECULATION_SEM = asyncio.Semaphore(Config.MAX_SPECULATIVE_CALLS)
+
+# Bounds concurrent agent calls issued by a single fan-out
+_LLM_SEM = asyncio.Semaphore(Config.MAX_CONCURRENT_AGENT_CALLS)
+
+# Decision strings mapped to roles without going through Enum's lookup path
+_ROLE_BY_VALUE = {role.value: role for role in AgentRole}
+
+# Phases in which each turn is stored in memory alongside the agent response
+_ROUND_PHASES = {DebatePhase.OPENING.value, DebatePhase.REBUTTAL.value, DebatePhase.CLOSING.value}
+
 class ControllerAgent(BaseAgent):
     """Main orchestrator that decides which agents to call and when"""
     
+    CONTEXT_FIELDS = ("phase", "current_round", "topic", "user_position")
+    RECENT_MESSAGE_LIMIT = 2
+    
+    DECISION_TPL = Template(dedent("""
+        You are the Controller Agent orchestrating a debate. Analyze the current situation and decide what action to take.
+
+        Current Context:
+        - Phase: $phase
+        - Round: $current_round
+        - Topic: $topic
+        - User Position: $user_position
+        - Recent Messages: $message_count
+
+        User Input: "$user_input"
+
+        Available Actions:
+        1. generate_topic - Use Topic Generator to create debate topic
+        2. moderate_debate - Use Moderator for neutral announcements/transitions
+        3. argue_for - Use For Debater to support user's position
+        4. argue_against - Use Against Debater to oppose user's position  
+        5. provide_feedback - Use Feedback Agent to evaluate arguments
+        6. coach_user - Use Coach Agent to give tips
+        7. store_memory - Use Memory Agent to save context
+        8. end_debate - Conclude the debate session
+
+        Set agent_to_call to one of: topic_generator, moderator, debater_for,
+        debater_against, feedback, coach, memory.
+    """))
+    
     def __init__(self, llm_service, memory_service, agents: Dict[AgentRole, BaseAgent]):
         super().__init__(AgentRole.CONTROLLER, llm_service, memory_service)
         self.agents = agents
+        self._build_decision = self._compile_builder(self.DECISION_TPL, view_slots=False)
         
-    async def execute(self, task: str, context: Dict[str, Any]) -> Dict[str, Any]:
+    async def execute(self, task: str, context: Dict[str, Any]) -> AgentResult:
         """Main decision-making logic for debate orchestration"""
         
-        # Analyze current situation
-        decision = await self._make_decision(task, context)
+        # Build the context view once for every agent called this tick,
+        # unless the caller already attached one
+        if "_view" not in context:
+            context["_view"] = ContextView.from_context(context)
+        
+        # When the rule-based fallback is a confident guess, run it alongside
+        # the AI decision instead of waiting for two round-trips in sequence
+        fallback = self._fallback_decision(task, context)
+        if (fallback.get("confidence", 0) >= Config.SPECULATION_MIN_CONFIDENCE
+                and not _SPECULATION_SEM.locked()):
+            await _SPECULATION_SEM.acquire()
+            decision_task = asyncio.create_task(self._make_decision(task, context))
+            speculative_task = asyncio.create_task(self._execute_decision(fallback, context))
+            speculative_task.add_done_callback(lambda _: _SPECULATION_SEM.release())
+            
+            decision = await decision_task
+            if decision.get("agent_to_call") == fallback["agent_to_call"]:
+                response = await speculative_task
+                response.controller_reasoning = decision.get("reasoning", "")
+                response.action_taken = decision.get("action", fallback["action"])
+                return response
+            
+            speculative_task.cancel()
+        else:
+            # Analyze current situation
+            decision = await self._make_decision(task, context)
         
         # Execute the decided action
         response = await self._execute_decision(decision, context)
@@ -30,51 +99,23 @@ class ControllerAgent(BaseAgent):
     async def _make_decision(self, user_input: str, context: Dict[str, Any]) -> Dict[str, Any]:
         """AI-powered decision making about what to do next"""
         
-        decision_prompt = f"""
-        You are the Controller Agent orchestrating a debate. Analyze the current situation and decide what action to take.
-        
-        Current Context:
-        - Phase: {context.get('phase', 'setup')}
-        - Round: {context.get('current_round', 0)}
-        - Topic: {context.get('topic', 'Not set')}
-        - User Position: {context.get('user_position', 'Not set')}
-        - Recent Messages: {len(context.get('recent_messages', []))}
-        
-        User Input: "{user_input}"
-        
-        Available Actions:
-        1. generate_topic - Use Topic Generator to create debate topic
-        2. moderate_debate - Use Moderator for neutral announcements/transitions
-        3. argue_for - Use For Debater to support user's position
-        4. argue_against - Use Against Debater to oppose user's position  
-        5. provide_feedback - Use Feedback Agent to evaluate arguments
-        6. coach_user - Use Coach Agent to give tips
-        7. store_memory - Use Memory Agent to save context
-        8. end_debate - Conclude the debate session
-        
-        Respond with JSON format:
-        {{
-            "action": "action_name",
-            "reasoning": "why this action was chosen",
-            "agent_to_call": "agent_role",
-            "specific_task": "detailed task for the agent",
-            "confidence": 0.8,
-            "metadata": {{"key": "value"}}
-        }}
-        """
+        decision_prompt = self._build_decision(
+            None,
+            phase=context.get('phase', 'setup'),
+            current_round=context.get('current_round', 0),
+            topic=context.get('topic', 'Not set'),
+            user_position=context.get('user_position', 'Not set'),
+            message_count=len(context.get('recent_messages', [])),
+            user_input=user_input
+        )
         
         try:
-            response = await self._call_llm(decision_prompt, context)
-            decision = json.loads(response)
-            return decision
-        except json.JSONDecodeError:
-            # Fallback decision if JSON parsing fails
-            return self._fallback_decision(user_input, context)
+            return await self._call_llm_structured(decision_prompt, ControllerDecision, context)
         except Exception as e:
             logger.error(f"Decision making failed: {e}")
             return self._fallback_decision(user_input, context)
     
-    async def _execute_decision(self, decision: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+    async def _execute_decision(self, decision: Dict[str, Any], context: Dict[str, Any]) -> AgentResult:
         """Execute the decided action by calling appropriate agent"""
         
         action = decision.get("action", "moderate_debate")
@@ -82,16 +123,26 @@ class ControllerAgent(BaseAgent):
         task = decision.get("specific_task", "Moderate the current situation")
         
         try:
-            # Map string role to AgentRole enum
-            agent_role_enum = AgentRole(agent_role)
+            # Unknown role strings map to None and fall through to the moderator
+            agent_role_enum = _ROLE_BY_VALUE.get(agent_role)
             
-            if agent_role_enum in self.agents:
-                agent = self.agents[agent_role_enum]
-                response = await agent.execute(task, context)
+            if agent_role_enum is not None and agent_role_enum in self.agents:
+                calls = [(agent_role_enum, task)]
+                if (context.get("phase") in _ROUND_PHASES
+                        and agent_role_enum != AgentRole.MEMORY
+                        and AgentRole.MEMORY in self.agents):
+                    calls.append((AgentRole.MEMORY, "Store the current debate context"))
+                
+                response, *side_results = await self._dispatch_many(calls, context)
+                for result in side_results:
+                    if isinstance(result, Exception):
+                        logger.warning(f"Side agent call failed: {result}")
+                if isinstance(response, Exception):
+                    raise response
                 
                 # Add controller's reasoning to response
-                response["controller_reasoning"] = decision.get("reasoning", "")
-                response["action_taken"] = action
+                response.controller_reasoning = decision.get("reasoning", "")
+                response.action_taken = action
                 
                 return response
             else:
@@ -105,6 +156,19 @@ class ControllerAgent(BaseAgent):
                 "Handle an error situation gracefully", context
             )
     
+    async def _dispatch_many(self, calls: List[Tuple[AgentRole, str]], 
+                             context: Dict[str, Any]) -> List[Any]:
+        """Run several agent calls concurrently; exceptions are returned, not raised"""
+        
+        async def dispatch(role: AgentRole, task: str) -> AgentResult:
+            async with _LLM_SEM:
+                return await self.agents[role].execute(task, context)
+        
+        return await asyncio.gather(
+            *(dispatch(role, task) for role, task in calls),
+            return_exceptions=True
+        )
+    
     def _fallback_decision(self, user_input: str, context: Dict[str, Any]) -> Dict[str, Any]:
         """Fallback decision logic when AI decision fails"""
         
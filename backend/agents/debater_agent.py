@@ -1,30 +1,31 @@
 """Debater Agents - Generate arguments for both sides of debates"""
 
 from typing import Dict, Any
+from string import Template
+from textwrap import dedent
 from agents.base_agent import BaseAgent, AgentRole
+from agents._packing import pack
+from models.agent_models import AgentResult
 import logging
 
 logger = logging.getLogger(__name__)
 
+_OPPOSITE = {"for": "against", "against": "for"}
+
 class DebaterForAgent(BaseAgent):
     """Agent that argues FOR the user's position (supportive debating)"""
     
-    def __init__(self, llm_service, memory_service=None):
-        super().__init__(AgentRole.DEBATER_FOR, llm_service, memory_service)
+    CONTEXT_FIELDS = ("topic", "user_position")
+    RECENT_MESSAGE_LIMIT = 3
     
-    async def execute(self, task: str, context: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate arguments supporting the user's position"""
-        
-        context_info = self._extract_context_info(context)
-        
-        prompt = f"""
+    PROMPT_TPL = Template(dedent("""
         Generate a strong argument SUPPORTING the user's position.
         
-        Topic: {context_info['topic']}
-        User's Position: {context_info['user_position']}
-        Current Round: {context_info['current_round']}
+        Topic: $topic
+        User's Position: $user_position
+        Current Round: $current_round
         
-        Task: {task}
+        Task: $task
         
         Your argument should:
         1. Strongly support the user's position
@@ -34,17 +35,31 @@ class DebaterForAgent(BaseAgent):
         5. Be engaging and educational
         6. Be 100-300 words
         
-        Recent context: {context_info['recent_messages'][-3:] if context_info['recent_messages'] else []}
-        """
+        Recent context: $recent_context
+    """))
+    
+    def __init__(self, llm_service, memory_service=None):
+        super().__init__(AgentRole.DEBATER_FOR, llm_service, memory_service)
+    
+    async def execute(self, task: str, context: Dict[str, Any]) -> AgentResult:
+        """Generate arguments supporting the user's position"""
+        
+        view = self._context_view(context)
+        
+        prompt = self._build_prompt(
+            view, task,
+            recent_context=pack(view.recent_messages, self.RECENT_TOKEN_BUDGET)
+        )
         
         try:
-            response = await self._call_llm(prompt, context)
+            response, cached = await self._call_llm(prompt, context)
             
             return self._format_response(
                 content=response,
                 reasoning="Generated supportive argument for user's position",
                 confidence=0.8,
-                metadata={"position": "for", "round": context_info['current_round']}
+                metadata={"position": "for", "round": view.current_round},
+                cached=cached
             )
             
         except Exception as e:
@@ -64,31 +79,18 @@ class DebaterForAgent(BaseAgent):
 class DebaterAgainstAgent(BaseAgent):
     """Agent that argues AGAINST the user's position (challenging debating)"""
     
-    def __init__(self, llm_service, memory_service=None):
-        super().__init__(AgentRole.DEBATER_AGAINST, llm_service, memory_service)
+    CONTEXT_FIELDS = ("topic", "user_position")
+    RECENT_MESSAGE_LIMIT = 3
     
-    async def execute(self, task: str, context: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate arguments opposing the user's position"""
-        
-        context_info = self._extract_context_info(context)
-        
-        # Determine what we're arguing against
-        if context_info['user_position'] == 'for':
-            our_position = 'against'
-            opposing_position = 'for'
-        else:
-            our_position = 'for' 
-            opposing_position = 'against'
-        
-        prompt = f"""
+    PROMPT_TPL = Template(dedent("""
         Generate a strong argument OPPOSING the user's position.
         
-        Topic: {context_info['topic']}
-        User's Position: {context_info['user_position']} 
-        Your Position: {our_position}
-        Current Round: {context_info['current_round']}
+        Topic: $topic
+        User's Position: $user_position 
+        Your Position: $our_position
+        Current Round: $current_round
         
-        Task: {task}
+        Task: $task
         
         Your argument should:
         1. Respectfully challenge the user's position
@@ -99,13 +101,31 @@ class DebaterAgainstAgent(BaseAgent):
         6. Be educational and thought-provoking
         7. Be 100-300 words
         
-        Recent context: {context_info['recent_messages'][-3:] if context_info['recent_messages'] else []}
+        Recent context: $recent_context
         
         Remember: Challenge ideas, not the person. Be rigorous but respectful.
-        """
+    """))
+    
+    def __init__(self, llm_service, memory_service=None):
+        super().__init__(AgentRole.DEBATER_AGAINST, llm_service, memory_service)
+    
+    async def execute(self, task: str, context: Dict[str, Any]) -> AgentResult:
+        """Generate arguments opposing the user's position"""
+        
+        view = self._context_view(context)
+        
+        # Determine what we're arguing against; an unset position is treated as "against"
+        our_position = _OPPOSITE.get(view.user_position, 'for')
+        opposing_position = _OPPOSITE[our_position]
+        
+        prompt = self._build_prompt(
+            view, task,
+            our_position=our_position,
+            recent_context=pack(view.recent_messages, self.RECENT_TOKEN_BUDGET)
+        )
         
         try:
-            response = await self._call_llm(prompt, context)
+            response, cached = await self._call_llm(prompt, context)
             
             return self._format_response(
                 content=response,
@@ -114,14 +134,15 @@ class DebaterAgainstAgent(BaseAgent):
                 metadata={
                     "position": our_position, 
                     "opposing": opposing_position,
-                    "round": context_info['current_round']
-                }
+                    "round": view.current_round
+                },
+                cached=cached
             )
             
         except Exception as e:
             logger.error(f"DebaterAgainst execution failed: {e}")
             return self._format_response(
-                content=f"I understand your position, but let me present an alternative perspective on {context_info['topic']}.",
+                content=f"I understand your position, but let me present an alternative perspective on {view.topic}.",
                 reasoning="Fallback response due to error",
                 confidence=0.3
             )
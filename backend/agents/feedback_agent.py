@@ -2,7 +2,10 @@
 """Feedback Agent - Evaluates debates and provides constructive feedback"""
 
 from typing import Dict, Any
+from string import Template
+from textwrap import dedent
 from agents.base_agent import BaseAgent, AgentRole
+from models.agent_models import AgentResult
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,59 +13,69 @@ logger = logging.getLogger(__name__)
 class FeedbackAgent(BaseAgent):
     """Provides neutral evaluation and constructive feedback on debates"""
     
-    def __init__(self, llm_service, memory_service=None):
-        super().__init__(AgentRole.FEEDBACK, llm_service, memory_service)
+    # Recent messages are already embedded in the evaluation prompt
+    CONTEXT_FIELDS = ("topic", "user_position", "current_round")
+    RECENT_MESSAGE_LIMIT = 0
     
-    async def execute(self, task: str, context: Dict[str, Any]) -> Dict[str, Any]:
-        """Provide comprehensive debate evaluation"""
-        
-        context_info = self._extract_context_info(context)
-        
-        prompt = f"""
+    PROMPT_TPL = Template(dedent("""
         Evaluate this debate comprehensively and provide constructive feedback.
-        
+
         Debate Details:
-        - Topic: {context_info['topic']}
-        - User Position: {context_info['user_position']}
-        - Total Rounds: {context_info['current_round']}
-        - Messages Exchanged: {len(context_info['recent_messages'])}
-        
+        - Topic: $topic
+        - User Position: $user_position
+        - Total Rounds: $current_round
+        - Messages Exchanged: $message_count
+
         Recent Conversation:
-        {context_info['recent_messages']}
-        
+        $conversation
+
         Provide evaluation covering:
-        
+
         1. **Argument Quality Assessment**
            - Strength of user's main arguments
            - Use of evidence and examples
            - Logical consistency
            - Addressing of counter-arguments
-        
+
         2. **Debate Skills Demonstrated**
            - Structure and organization
            - Rhetorical effectiveness  
            - Response to challenges
            - Overall persuasiveness
-        
+
         3. **Areas for Improvement**
            - Specific weaknesses identified
            - Missed opportunities
            - Suggestions for stronger arguments
-        
+
         4. **Strengths to Build On**
            - What the user did well
            - Effective techniques used
            - Natural debate skills shown
-        
+
         5. **Overall Performance**
            - Brief summary of debate performance
            - Encouragement and next steps
-        
+
         Keep feedback constructive, specific, and encouraging. Format as a comprehensive evaluation.
-        """
+    """))
+    
+    def __init__(self, llm_service, memory_service=None):
+        super().__init__(AgentRole.FEEDBACK, llm_service, memory_service)
+    
+    async def execute(self, task: str, context: Dict[str, Any]) -> AgentResult:
+        """Provide comprehensive debate evaluation"""
+        
+        view = self._context_view(context)
+        
+        prompt = self._build_prompt(
+            view,
+            message_count=len(view.recent_messages),
+            conversation=list(view.recent_messages)
+        )
         
         try:
-            evaluation = await self._call_llm(prompt, context)
+            evaluation, cached = await self._call_llm(prompt, context)
             
             return self._format_response(
                 content=evaluation,
@@ -70,15 +83,16 @@ class FeedbackAgent(BaseAgent):
                 confidence=0.9,
                 metadata={
                     "evaluation_type": "comprehensive",
-                    "rounds_evaluated": context_info['current_round'],
-                    "total_exchanges": len(context_info['recent_messages'])
-                }
+                    "rounds_evaluated": view.current_round,
+                    "total_exchanges": len(view.recent_messages)
+                },
+                cached=cached
             )
             
         except Exception as e:
             logger.error(f"Feedback generation failed: {e}")
             return self._format_response(
-                content=f"Thank you for an engaging debate on {context_info['topic']}! You demonstrated good critical thinking skills and presented your arguments clearly. Consider strengthening your points with more specific evidence in future debates.",
+                content=f"Thank you for an engaging debate on {view.topic}! You demonstrated good critical thinking skills and presented your arguments clearly. Consider strengthening your points with more specific evidence in future debates.",
                 reasoning="Fallback feedback due to generation error",
                 confidence=0.6
             )
@@ -1,21 +1,82 @@
 # backend/agents/memory_agent.py
 """Memory Agent - Handles context storage and retrieval"""
 
-from typing import Dict, Any, List
+from typing import Dict, Any, Deque, Optional
+from string import Template
+from textwrap import dedent
+from collections import deque
+from itertools import islice
 from agents.base_agent import BaseAgent, AgentRole
+from agents._packing import pack
+from agents._sim import normalize, topk_cosine
+from models.agent_models import AgentResult
 import logging
-import json
+import numpy as np
+import orjson
 
 logger = logging.getLogger(__name__)
 
+# Entries kept per session; older ones are dropped to prevent memory bloat
+MAX_SESSION_MEMORIES = 20
+
 class MemoryAgent(BaseAgent):
     """Manages conversation context and historical information"""
     
+    # Stored memories are already embedded in the summary prompt
+    CONTEXT_FIELDS = ("topic", "user_position", "phase")
+    RECENT_MESSAGE_LIMIT = 0
+    
+    UPDATE_TPL = Template(dedent("""
+        Update the running summary of this debate conversation.
+
+        Topic: $topic
+        User Position: $user_position
+
+        Prior summary:
+        $prior_summary
+
+        New turns:
+        $new_turns
+
+        Merge the new turns into an updated summary covering the same points
+        as the prior summary. Keep summary under 200 words.
+    """))
+    
+    SUMMARY_TPL = Template(dedent("""
+        Summarize the key points from this debate conversation:
+
+        Topic: $topic
+        User Position: $user_position
+
+        Conversation History:
+        $history
+
+        Provide a concise summary covering:
+        1. Main arguments presented by user
+        2. Main counter-arguments presented by AI
+        3. Key evidence or examples mentioned
+        4. Current state of the debate
+        5. Strengths and weaknesses observed
+
+        Keep summary under 200 words.
+    """))
+    
     def __init__(self, llm_service, memory_service=None):
         super().__init__(AgentRole.MEMORY, llm_service, memory_service)
-        self.session_memories: Dict[str, List[Dict]] = {}
+        self.session_memories: Dict[str, Deque[Dict]] = {}
+        # Unit-normalized embedding per memory entry (None when not supplied)
+        self.session_embeddings: Dict[str, Deque[Optional[np.ndarray]]] = {}
+        # Serialized views of each session's memories, invalidated on store
+        self._serialized_cache: Dict[str, Dict[str, str]] = {}
+        # Rolling summary per session, and how many stored entries it covers
+        self.running_summaries: Dict[str, str] = {}
+        self.summary_cursor: Dict[str, int] = {}
+        self._stored_counts: Dict[str, int] = {}
+        # Summary prompts read their fields from the context with their own defaults
+        self._build_update = self._compile_builder(self.UPDATE_TPL, view_slots=False)
+        self._build_summary = self._compile_builder(self.SUMMARY_TPL, view_slots=False)
     
-    async def execute(self, task: str, context: Dict[str, Any]) -> Dict[str, Any]:
+    async def execute(self, task: str, context: Dict[str, Any]) -> AgentResult:
         """Execute memory operations"""
         
         session_id = context.get("session_id", "default")
@@ -33,43 +94,60 @@ class MemoryAgent(BaseAgent):
                 confidence=0.7
             )
     
-    async def _store_memory(self, session_id: str, context: Dict[str, Any]) -> Dict[str, Any]:
+    async def _store_memory(self, session_id: str, context: Dict[str, Any]) -> AgentResult:
         """Store conversation context"""
         
-        if session_id not in self.session_memories:
-            self.session_memories[session_id] = []
-        
         # Extract key information to store
         memory_entry = {
             "timestamp": context.get("timestamp"),
             "topic": context.get("topic"),
             "user_position": context.get("user_position"),
             "phase": context.get("phase"),
-            "recent_messages": context.get("recent_messages", [])[-3:],  # Last 3 messages
+            "recent_messages": pack(context.get("recent_messages", []), self.RECENT_TOKEN_BUDGET, limit=3),
             "metadata": context.get("metadata", {})
         }
         
-        self.session_memories[session_id].append(memory_entry)
+        # Bounded deque drops the oldest entry once full
+        memories = self.session_memories.setdefault(session_id, deque(maxlen=MAX_SESSION_MEMORIES))
+        memories.append(memory_entry)
         
-        # Keep only last 20 entries to prevent memory bloat
-        if len(self.session_memories[session_id]) > 20:
-            self.session_memories[session_id] = self.session_memories[session_id][-20:]
+        embedding = context.get("embedding")
+        if embedding is None and memory_entry["recent_messages"]:
+            embedding = await self._embed(self._memory_text(memory_entry))
+        self.session_embeddings.setdefault(session_id, deque(maxlen=MAX_SESSION_MEMORIES)).append(
+            normalize(embedding) if embedding is not None else None
+        )
+        self._serialized_cache.pop(session_id, None)
+        self._stored_counts[session_id] = self._stored_counts.get(session_id, 0) + 1
         
         return self._format_response(
             content="Context stored successfully",
             reasoning="Stored current debate context in memory",
             confidence=0.95,
-            metadata={"stored_entries": len(self.session_memories[session_id])}
+            metadata={"stored_entries": len(memories)}
         )
     
-    async def _retrieve_memory(self, session_id: str, context: Dict[str, Any]) -> Dict[str, Any]:
+    async def _retrieve_memory(self, session_id: str, context: Dict[str, Any]) -> AgentResult:
         """Retrieve stored context"""
         
         if session_id in self.session_memories:
             memories = self.session_memories[session_id]
             
+            query_embedding = context.get("query_embedding")
+            if query_embedding is None and context.get("user_message"):
+                query_embedding = await self._embed(context["user_message"])
+            if query_embedding is not None:
+                relevant = self._most_similar(session_id, query_embedding, k=5)
+                if relevant:
+                    return self._format_response(
+                        content=orjson.dumps(relevant, default=str, option=orjson.OPT_INDENT_2).decode(),
+                        reasoning="Retrieved most relevant conversation history",
+                        confidence=0.9,
+                        metadata={"total_memories": len(memories), "retrieval": "semantic"}
+                    )
+            
             return self._format_response(
-                content=json.dumps(memories[-5:], indent=2),  # Last 5 memory entries
+                content=self._serialize_memories(session_id, recent_only=True),  # Last 5 memory entries
                 reasoning="Retrieved recent conversation history",
                 confidence=0.9,
                 metadata={"total_memories": len(memories)}
@@ -81,10 +159,10 @@ class MemoryAgent(BaseAgent):
                 confidence=0.8
             )
     
-    async def _summarize_context(self, session_id: str, context: Dict[str, Any]) -> Dict[str, Any]:
+    async def _summarize_context(self, session_id: str, context: Dict[str, Any]) -> AgentResult:
         """Generate context summary using LLM"""
         
-        memories = self.session_memories.get(session_id, [])
+        memories = self.session_memories.get(session_id)
         
         if not memories:
             return self._format_response(
@@ -93,33 +171,50 @@ class MemoryAgent(BaseAgent):
                 confidence=0.8
             )
         
-        prompt = f"""
-        Summarize the key points from this debate conversation:
-        
-        Topic: {context.get('topic', 'Unknown')}
-        User Position: {context.get('user_position', 'Unknown')}
+        stored_count = self._stored_counts.get(session_id, len(memories))
+        new_count = stored_count - self.summary_cursor.get(session_id, 0)
+        running_summary = self.running_summaries.get(session_id)
         
-        Conversation History:
-        {json.dumps(memories, indent=2)}
-        
-        Provide a concise summary covering:
-        1. Main arguments presented by user
-        2. Main counter-arguments presented by AI
-        3. Key evidence or examples mentioned
-        4. Current state of the debate
-        5. Strengths and weaknesses observed
+        # Nothing stored since the last summary, so reuse it without an LLM call
+        if running_summary and new_count <= 0:
+            return self._format_response(
+                content=running_summary,
+                reasoning="Reused rolling summary; no new memories since last update",
+                confidence=0.85,
+                metadata={"summarized_entries": stored_count, "new_entries": 0}
+            )
         
-        Keep summary under 200 words.
-        """
+        if running_summary and new_count < len(memories):
+            # Only the entries stored since the last summary need to be sent
+            new_entries = list(islice(memories, len(memories) - new_count, len(memories)))
+            prompt = self._build_update(
+                None,
+                topic=context.get('topic', 'Unknown'),
+                user_position=context.get('user_position', 'Unknown'),
+                prior_summary=running_summary,
+                new_turns=orjson.dumps(new_entries, default=str, option=orjson.OPT_INDENT_2).decode()
+            )
+        else:
+            prompt = self._build_summary(
+                None,
+                topic=context.get('topic', 'Unknown'),
+                user_position=context.get('user_position', 'Unknown'),
+                history=self._serialize_memories(session_id)
+            )
         
         try:
-            summary = await self._call_llm(prompt, context)
+            summary, cached = await self._call_llm(prompt, context)
+            
+            # Advance summary and cursor together, only once the LLM call succeeded
+            self.running_summaries[session_id] = summary
+            self.summary_cursor[session_id] = stored_count
             
             return self._format_response(
                 content=summary,
                 reasoning="Generated context summary from stored memories",
                 confidence=0.85,
-                metadata={"summarized_entries": len(memories)}
+                metadata={"summarized_entries": stored_count, "new_entries": min(new_count, len(memories))},
+                cached=cached
             )
             
         except Exception as e:
@@ -130,6 +225,50 @@ class MemoryAgent(BaseAgent):
                 confidence=0.3
             )
     
+    def _most_similar(self, session_id: str, query_embedding, k: int) -> list:
+        """Memory entries whose embeddings are closest to the query, best first"""
+        
+        query = normalize(query_embedding)
+        if query.ndim != 1:
+            logger.warning(f"Ignoring query embedding of shape {query.shape}")
+            return []
+        
+        # The kernel does not bounds-check, so only rows of the query's
+        # dimension may reach it
+        pairs = [
+            (entry, embedding)
+            for entry, embedding in zip(self.session_memories[session_id],
+                                        self.session_embeddings.get(session_id, ()))
+            if embedding is not None and embedding.shape == query.shape
+        ]
+        if not pairs:
+            return []
+        
+        matrix = np.stack([embedding for _, embedding in pairs])
+        indices, _ = topk_cosine(query, matrix, k)
+        return [pairs[i][0] for i in indices]
+    
+    @staticmethod
+    def _memory_text(memory_entry: Dict[str, Any]) -> str:
+        """Text embedded for a memory entry: the contents of its recent messages"""
+        return "\n".join(str(msg.get("content", "")) for msg in memory_entry["recent_messages"])
+    
+    def _serialize_memories(self, session_id: str, recent_only: bool = False) -> str:
+        """JSON form of a session's memories, reused until the next store"""
+        
+        scope = "recent" if recent_only else "all"
+        cached = self._serialized_cache.setdefault(session_id, {})
+        
+        if scope not in cached:
+            memories = self.session_memories[session_id]
+            if recent_only:
+                memories = islice(memories, max(0, len(memories) - 5), len(memories))
+            cached[scope] = orjson.dumps(
+                list(memories), default=str, option=orjson.OPT_INDENT_2
+            ).decode()
+        
+        return cached[scope]
+    
     def _get_role_prompt(self) -> str:
         return """You are the Memory Agent responsible for storing, retrieving,
         and summarizing conversation context. You help maintain continuity
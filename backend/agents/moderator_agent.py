@@ -2,7 +2,10 @@
 """Moderator Agent - Maintains neutrality and manages debate flow"""
 
 from typing import Dict, Any
+from string import Template
+from textwrap import dedent
 from agents.base_agent import BaseAgent, AgentRole
+from models.agent_models import AgentResult
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,41 +13,52 @@ logger = logging.getLogger(__name__)
 class ModeratorAgent(BaseAgent):
     """Neutral moderator that manages debate flow and announcements"""
     
-    def __init__(self, llm_service, memory_service=None):
-        super().__init__(AgentRole.MODERATOR, llm_service, memory_service)
+    CONTEXT_FIELDS = ("topic", "phase", "current_round", "user_position")
+    RECENT_MESSAGE_LIMIT = 2
+    # Introductions and announcements are procedural, so an identical
+    # request can reuse the earlier completion
+    REUSE_RESPONSES = True
     
-    async def execute(self, task: str, context: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute moderator tasks neutrally"""
-        
-        context_info = self._extract_context_info(context)
-        
-        prompt = f"""
-        You are a neutral debate moderator. Your task: {task}
-        
-        Current Debate Context:
-        - Topic: {context_info['topic']}
-        - Phase: {context_info['phase']}
-        - Round: {context_info['current_round']}
-        - User Position: {context_info['user_position']}
-        
+    PROMPT_TPL = Template(dedent("""
+        You are a neutral debate moderator.
+
         Your response should be:
         1. Completely neutral and unbiased
         2. Professional and encouraging
         3. Clear about next steps or expectations
         4. Educational about debate process
         5. 50-150 words unless task requires more
+
+        Current Debate Context:
+        - Topic: $topic
+        - Phase: $phase
+        - Round: $current_round
+        - User Position: $user_position
+
+        Recent messages for context: $recent_context
+
+        Your task: $task
+    """))
+    
+    def __init__(self, llm_service, memory_service=None):
+        super().__init__(AgentRole.MODERATOR, llm_service, memory_service)
+    
+    async def execute(self, task: str, context: Dict[str, Any]) -> AgentResult:
+        """Execute moderator tasks neutrally"""
+        
+        view = self._context_view(context)
         
-        Recent messages for context: {context_info['recent_messages'][-2:] if context_info['recent_messages'] else []}
-        """
+        prompt = self._build_prompt(view, task, recent_context=list(view.recent_messages[-2:]))
         
         try:
-            response = await self._call_llm(prompt, context)
+            response, cached = await self._call_llm(prompt, context)
             
             return self._format_response(
                 content=response,
                 reasoning="Neutral moderation response",
                 confidence=0.9,
-                metadata={"neutral": True, "phase": context_info['phase']}
+                metadata={"neutral": True, "phase": view.phase},
+                cached=cached
             )
             
         except Exception as e:
@@ -1,80 +1,169 @@
 # backend/agents/topic_generator.py
 """Topic Generator Agent - Creates engaging debate topics"""
 
-from typing import Dict, Any
+from typing import Dict, Any, DefaultDict, List, Tuple
+from collections import defaultdict
+from string import Template
+from textwrap import dedent
 from agents.base_agent import BaseAgent, AgentRole
+from models.agent_models import AgentResult
+import asyncio
 import logging
 import random
 
 logger = logging.getLogger(__name__)
 
+# Warm pool of generated topics per (category, difficulty), kept half full
+TOPIC_POOL_SIZE = 8
+_topic_pool: DefaultDict[Tuple[str, str], asyncio.Queue] = defaultdict(
+    lambda: asyncio.Queue(maxsize=TOPIC_POOL_SIZE)
+)
+_refill_tasks: Dict[Tuple[str, str], asyncio.Task] = {}
+
+FALLBACK_TOPICS = [
+    "Artificial intelligence should be regulated by international law",
+    "Social media has done more harm than good to society",
+    "Climate change policies should take priority over economic growth",
+    "Online privacy is more important than national security"
+]
+
 class TopicGeneratorAgent(BaseAgent):
     """Generates compelling debate topics based on user preferences"""
     
-    def __init__(self, llm_service, memory_service=None):
-        super().__init__(AgentRole.TOPIC_GENERATOR, llm_service, memory_service)
+    # Topic prompts are built from the topic request alone
+    CONTEXT_FIELDS = ()
+    RECENT_MESSAGE_LIMIT = 0
     
-    async def execute(self, task: str, context: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate debate topics"""
-        
-        topic_request = context.get("topic_request", {})
-        category = topic_request.get("category", "general")
-        difficulty = topic_request.get("difficulty", "moderate")
-        
-        prompt = f"""
+    PROMPT_TPL = Template(dedent("""
         Generate an engaging debate topic suitable for educational debate practice.
-        
+
         Requirements:
-        - Category: {category}
-        - Difficulty: {difficulty}
         - Should have clear "for" and "against" positions
         - Should be current and relevant
         - Should encourage critical thinking
         - Should be suitable for educational purposes
-        
-        Task: {task}
-        
+
         Provide just the topic statement, phrased as a proposition that can be debated.
         Examples:
         - "Social media companies should be legally required to fact-check all posts"
         - "Universal basic income should be implemented globally"
         - "Space exploration funding should be redirected to climate change research"
-        
+
+        Category: $category
+        Difficulty: $difficulty
+        Task: $task
+
         Generate one clear, debatable topic (not a question, but a statement to argue for/against):
-        """
+    """))
+    
+    def __init__(self, llm_service, memory_service=None):
+        super().__init__(AgentRole.TOPIC_GENERATOR, llm_service, memory_service)
+    
+    async def execute(self, task: str, context: Dict[str, Any]) -> AgentResult:
+        """Generate debate topics"""
+        
+        topic_request = context.get("topic_request", {})
+        category = topic_request.get("category", "general")
+        difficulty = topic_request.get("difficulty", "moderate")
+        
+        # Serve from the warm pool when possible, topping it up in the background
+        key = (category, difficulty)
+        pool = _topic_pool[key]
+        self._schedule_refill(key, topic_request)
+        if not pool.empty():
+            return self._topic_response(pool.get_nowait(), category, difficulty, pooled=True)
+        
+        prompt = self._build_prompt(None, task, category=category, difficulty=difficulty)
         
         try:
-            response = await self._call_llm(prompt, context)
+            # The prompt depends only on category and difficulty, so a cached
+            # response would hand every user the same topic
+            response, _ = await self._call_llm(prompt, context, use_cache=False)
             
-            # Clean up the response to ensure it's just the topic
-            topic = response.strip().strip('"').strip("'")
-            
-            return self._format_response(
-                content=topic,
-                reasoning=f"Generated {difficulty} debate topic in {category} category",
-                confidence=0.85,
-                metadata={
-                    "category": category,
-                    "difficulty": difficulty,
-                    "type": "generated_topic"
-                }
-            )
+            return self._topic_response(self._clean_topic(response), category, difficulty)
             
         except Exception as e:
             logger.error(f"Topic generation failed: {e}")
-            # Fallback topics
-            fallback_topics = [
-                "Artificial intelligence should be regulated by international law",
-                "Social media has done more harm than good to society",
-                "Climate change policies should take priority over economic growth",
-                "Online privacy is more important than national security"
-            ]
-            
-            return self._format_response(
-                content=random.choice(fallback_topics),
-                reasoning="Fallback topic due to generation error",
-                confidence=0.6
-            )
+            return self._fallback_response()
+    
+    async def execute_batch(self, tasks: List[str], context: Dict[str, Any]) -> List[AgentResult]:
+        """
+        Generate one topic per task concurrently
+        
+        Bypasses the response caches so identical tasks still produce
+        distinct topics; failed generations fall back to a stock topic.
+        """
+        
+        topic_request = context.get("topic_request", {})
+        category = topic_request.get("category", "general")
+        difficulty = topic_request.get("difficulty", "moderate")
+        
+        prompts = [
+            self._build_prompt(None, task, category=category, difficulty=difficulty)
+            for task in tasks
+        ]
+        responses = await asyncio.gather(
+            *(self._call_llm(prompt, context, use_cache=False) for prompt in prompts),
+            return_exceptions=True
+        )
+        
+        results = []
+        for response in responses:
+            if isinstance(response, Exception):
+                logger.error(f"Topic generation failed: {response}")
+                results.append(self._fallback_response())
+            else:
+                results.append(self._topic_response(self._clean_topic(response[0]), category, difficulty))
+        return results
+    
+    def _schedule_refill(self, key: Tuple[str, str], topic_request: Dict[str, Any]):
+        """Start a background refill for this pool unless one is running"""
+        task = _refill_tasks.get(key)
+        if task is None or task.done():
+            _refill_tasks[key] = asyncio.create_task(self._refill(key, topic_request))
+    
+    async def _refill(self, key: Tuple[str, str], topic_request: Dict[str, Any]):
+        """Top the pool up to half capacity with freshly generated topics"""
+        pool = _topic_pool[key]
+        missing = TOPIC_POOL_SIZE // 2 - pool.qsize()
+        if missing <= 0:
+            return
+        
+        results = await self.execute_batch(
+            ["Generate a debate topic"] * missing,
+            {"topic_request": topic_request}
+        )
+        for result in results:
+            # Stock fallback topics are not worth pooling
+            if result.metadata.get("type") != "generated_topic" or pool.full():
+                continue
+            pool.put_nowait(result.content)
+    
+    @staticmethod
+    def _clean_topic(response: str) -> str:
+        # Clean up the response to ensure it's just the topic
+        return response.strip().strip('"').strip("'")
+    
+    def _topic_response(self, topic: str, category: str, difficulty: str,
+                        pooled: bool = False) -> AgentResult:
+        return self._format_response(
+            content=topic,
+            reasoning=f"Generated {difficulty} debate topic in {category} category",
+            confidence=0.85,
+            metadata={
+                "category": category,
+                "difficulty": difficulty,
+                "type": "generated_topic",
+                "pooled": pooled
+            }
+        )
+    
+    def _fallback_response(self) -> AgentResult:
+        return self._format_response(
+            content=random.choice(FALLBACK_TOPICS),
+            reasoning="Fallback topic due to generation error",
+            confidence=0.6
+        )
     
     def _get_role_prompt(self) -> str:
         return """You are a creative topic generator for educational debates.
@@ -5,14 +5,23 @@ This version includes fallbacks if agent files are missing
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
+import asyncio
 import logging
+from collections import OrderedDict
+import time
 import uuid
-from typing import Dict, Optional
+from typing import Dict, Hashable, Optional, Tuple
 from datetime import datetime
+from string import Template
+from textwrap import dedent
 import google.generativeai as genai
+import orjson
 import os
 from dotenv import load_dotenv
+from services.cache_service import ExactCache, SemanticCache
+from services.session_store import create_session_store
+from utils.position import detect_position
 
 # Load environment variables
 load_dotenv()
@@ -21,7 +30,12 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Multi-Agent Debate System", version="1.0.0")
+# Responses are plain dicts serialized by orjson, without response_model validation
+app = FastAPI(
+    title="Multi-Agent Debate System",
+    version="1.0.0",
+    default_response_class=ORJSONResponse
+)
 
 # CORS middleware
 app.add_middleware(
@@ -32,49 +46,406 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global state
-active_sessions: Dict = {}
+# Session state; shared through Redis when REDIS_URL is set
+session_store = create_session_store()
 
 # Configure Gemini
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_MODEL = "gemini-2.5-flash"
+
+# Shared model for every uncached call; None until an API key is configured
+_MODEL: Optional[genai.GenerativeModel] = None
+
 if not GEMINI_API_KEY:
     logger.error("GEMINI_API_KEY not found in environment variables!")
 else:
     genai.configure(api_key=GEMINI_API_KEY)
+    _MODEL = genai.GenerativeModel(GEMINI_MODEL)
     logger.info("Gemini API configured successfully")
 
+def _require_model() -> genai.GenerativeModel:
+    """The shared model, or an error when Gemini is not configured"""
+    if _MODEL is None:
+        raise RuntimeError("GEMINI_API_KEY is not configured")
+    return _MODEL
+
+# Bounds concurrent Gemini calls, since turns and evaluations now fan out
+_llm_semaphore = asyncio.Semaphore(8)
+
+# Identical prompts (repeated topic and moderation requests) skip the round-trip
+exact_cache = ExactCache(maxsize=1024)
+
+# Near-duplicate prompts (welcome, setup moderation) reuse earlier completions.
+# Namespaces keep template families and topics apart, since prompts that
+# differ only in the topic would otherwise embed as near-identical.
+semantic_cache = SemanticCache(
+    os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2"),
+    threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9"))
+)
+
+async def _generate(prompt: str, use_cache: bool = True) -> Optional[str]:
+    """
+    Single Gemini round-trip; None when no candidate came back
+    
+    Pass ``use_cache=False`` when the same prompt must be able to yield
+    different responses (e.g. topic generation).
+    """
+    if use_cache:
+        cached = exact_cache.get(prompt)
+        if cached is not None:
+            return cached
+    
+    model = _require_model()
+    async with _llm_semaphore:
+        response = await model.generate_content_async(prompt)
+    
+    if response.candidates:
+        text = response.candidates[0].content.parts[0].text
+        if use_cache:
+            exact_cache.set(prompt, text)
+        return text
+    return None
+
 # Simple LLM caller
-async def call_llm(prompt: str) -> str:
+async def call_llm(prompt: str, use_cache: bool = True) -> str:
     """Call Gemini API"""
     try:
-        model = genai.GenerativeModel('gemini-2.5-flash')
-        response = await model.generate_content_async(prompt)
-        
-        if response.candidates:
-            return response.candidates[0].content.parts[0].text
-        else:
-            return "I'm processing your request. Please try again."
+        response = await _generate(prompt, use_cache)
+        return response if response is not None else "I'm processing your request. Please try again."
             
     except Exception as e:
         logger.error(f"LLM call failed: {e}")
         return f"I encountered an error: {str(e)}"
 
+async def cached_call_llm(prompt: str, namespace: Hashable, similar_text: Optional[str] = None) -> str:
+    """
+    call_llm behind the semantic cache; only successful completions are stored
+    
+    ``similar_text`` is the variable part of the prompt that similarity is
+    judged on (the whole prompt by default). Pass it when fixed template text
+    would otherwise dominate the embedding.
+    """
+    similar_text = prompt if similar_text is None else similar_text
+    cached = exact_cache.get(prompt)
+    if cached is None:
+        cached = await semantic_cache.get(namespace, similar_text)
+    if cached is not None:
+        return cached
+    
+    try:
+        response = await _generate(prompt)
+    except Exception as e:
+        logger.error(f"LLM call failed: {e}")
+        return f"I encountered an error: {str(e)}"
+    
+    if response is None:
+        return "I'm processing your request. Please try again."
+    
+    await semantic_cache.set(namespace, similar_text, response)
+    return response
+
+# Prompts are compiled once so their static text is byte-identical across
+# calls, which keeps the exact cache and Gemini's prefix caching effective
+DEBATER_TPL = Template(dedent("""\
+    You are a skilled debater $ai_stance the topic: "$topic"
+    
+    Your position: $ai_position
+    User's position: $user_position
+    
+    For each user message, provide a strong, respectful counter-argument that:
+    1. Addresses their specific point
+    2. Presents evidence or examples
+    3. Uses logical reasoning
+    4. Challenges their position constructively
+    5. Is 100-200 words"""))
+
+def debater_instruction(state: dict) -> str:
+    """Static part of the debater prompt; fixed once both positions are chosen"""
+    return DEBATER_TPL.substitute(
+        ai_stance="supporting" if state["ai_position"] == "for" else "opposing",
+        topic=state["topic"],
+        ai_position=state["ai_position"],
+        user_position=state["user_position"]
+    )
+
+async def call_debater(state: dict, turn_prompt: str) -> str:
+    """
+    Send a debater turn
+    
+    The session's debater instruction leads every turn prompt, so Gemini's
+    implicit caching can reuse the shared prefix across turns.
+    """
+    return await call_llm(f"{debater_instruction(state)}\n\n{turn_prompt}")
+
+async def stream_debater(state: dict, turn_prompt: str):
+    """Yield a debater turn's text chunks as Gemini generates them"""
+    model = _require_model()
+    async with _llm_semaphore:
+        response = await model.generate_content_async(
+            f"{debater_instruction(state)}\n\n{turn_prompt}", stream=True
+        )
+    
+    async for chunk in response:
+        try:
+            text = chunk.text
+        except ValueError:
+            # Chunk without text parts (e.g. only finish metadata)
+            continue
+        if text:
+            yield text
+
+# Messages kept verbatim in the session state; older ones are folded into
+# context_summary and remain available through the history endpoint
+MAX_LIVE_MESSAGES = 10
+
+SUMMARY_TPL = Template(dedent("""\
+    Summarize: update the running summary of this debate on "$topic".
+    
+    Prior summary:
+    $summary
+    
+    New turns:
+    $turns
+    
+    Keep the main arguments from both sides and any evidence cited. Keep it under 150 words."""))
+
+def start_compaction(state: dict) -> Optional[asyncio.Task]:
+    """
+    Start summarizing the oldest live messages, or return None when not needed
+    
+    The summary is generated alongside the turn's AI response and applied
+    by finish_turn, so the user never waits for the two calls in series.
+    """
+    messages = state["messages"]
+    if len(messages) <= MAX_LIVE_MESSAGES:
+        return None
+    
+    # Fold down to half the window so summarization runs every few turns
+    evicted = messages[:len(messages) - MAX_LIVE_MESSAGES // 2]
+    turns = "\n".join(f"{msg['role']}: {msg['content']}" for msg in evicted)
+    prompt = SUMMARY_TPL.substitute(
+        topic=state["topic"],
+        summary=state.get("context_summary") or "None yet.",
+        turns=turns
+    )
+    return asyncio.create_task(summarize_history(prompt, len(evicted)))
+
+async def summarize_history(prompt: str, evicted: int) -> Optional[tuple]:
+    """Updated summary and the number of messages it covers, or None on failure"""
+    try:
+        summary = await _generate(prompt)
+    except Exception as e:
+        # Keep the messages live and retry on a later turn
+        logger.warning(f"History summarization failed: {e}")
+        return None
+    return (summary.strip(), evicted) if summary else None
+
+async def apply_compaction(state: dict, compaction: Optional[asyncio.Task]):
+    """Fold the summarized messages out of the live window"""
+    if compaction is None:
+        return
+    folded = await compaction
+    if folded is None:
+        return
+    state["context_summary"], evicted = folded
+    del state["messages"][:evicted]
+
+def transcript_entry(msg: dict) -> str:
+    """One message formatted for the evaluation transcript"""
+    return f"{msg['role'].upper()}: {msg['content']}\n\n"
+
+def public_message(msg: dict) -> dict:
+    """Message as returned by the API, with its epoch-ns timestamp in ISO 8601"""
+    timestamp = msg.get("timestamp")
+    if not isinstance(timestamp, int):
+        # Messages stored before timestamps moved to epoch ns already hold ISO strings
+        return msg
+    return {**msg, "timestamp": datetime.fromtimestamp(timestamp / 1e9).isoformat()}
+
+def public_messages(messages: list) -> list:
+    return [public_message(msg) for msg in messages]
+
+def public_state(state: dict, with_messages: bool = True) -> dict:
+    """Session state as returned by the API.
+
+    Debate responses leave out the live messages and send only the turn's
+    new ones, which the client appends to its own copy.
+    """
+    public = {k: v for k, v in state.items() if k != "messages"}
+    if with_messages:
+        public["messages"] = public_messages(state["messages"])
+    return public
+
+# Evaluation rubric; each section is generated by its own concurrent call
+EVALUATION_SECTIONS = [
+    ("Argument Quality", "- Assess the strength of the user's main arguments\n- Note use of evidence and examples"),
+    ("Debate Skills", "- Structure and organization\n- Response to counter-arguments\n- Persuasiveness"),
+    ("Strengths", "- What the user did well\n- Effective techniques used"),
+    ("Areas for Improvement", "- Specific weaknesses\n- Suggestions for stronger arguments"),
+    ("Overall Summary", "- Brief performance summary\n- Encouragement and next steps"),
+]
+
+# The debate comes before the section details so all section calls share a prefix
+EVALUATION_TPL = Template(dedent("""\
+    You are an expert debate evaluator giving feedback on this debate.
+    
+    Topic: $topic
+    User's Position: $user_position
+    Rounds: $rounds
+    
+    Full Conversation:
+    $conversation
+    
+    Write only the "$title" section of the feedback. Cover:
+    $points
+    
+    Keep feedback constructive, specific, and encouraging. Do not repeat the section heading."""))
+
+# A speculative reply is only reused when the actual user message embeds
+# this close to the argument the model predicted
+SPECULATION_THRESHOLD = float(os.getenv("SPECULATION_THRESHOLD", "0.85"))
+
+# Unclaimed speculations are dropped after this long, or oldest first once
+# this many are held; abandoned sessions never claim theirs
+SPECULATION_TTL_SECONDS = 600
+MAX_SPECULATIONS = 1024
+
+# One speculation per session with the monotonic time it started, oldest
+# first. Kept outside the session state, which is returned to the client
+# and must stay serializable.
+_speculations: "OrderedDict[str, Tuple[asyncio.Task, float]]" = OrderedDict()
+
+def pop_speculation(session_id: str) -> Optional[asyncio.Task]:
+    """Remove a session's speculation, returning its task if still fresh"""
+    entry = _speculations.pop(session_id, None)
+    if entry is None:
+        return None
+    task, started_at = entry
+    if started_at + SPECULATION_TTL_SECONDS < time.monotonic():
+        task.cancel()
+        return None
+    return task
+
+def _evict_speculations():
+    """Drop expired speculations, and the oldest ones beyond MAX_SPECULATIONS"""
+    deadline = time.monotonic() - SPECULATION_TTL_SECONDS
+    while _speculations:
+        task, started_at = next(iter(_speculations.values()))
+        if started_at >= deadline and len(_speculations) <= MAX_SPECULATIONS:
+            break
+        task.cancel()
+        _speculations.popitem(last=False)
+
+SPECULATION_TPL = Template(dedent("""\
+    $instruction
+    
+    Recent conversation:
+    $conversation
+    
+    Predict the user's most likely next argument and draft your counter to it.
+    Answer in exactly this format:
+    PREDICTION: <the user's next argument in one or two sentences>
+    REPLY: <your counter-argument>"""))
+
+async def _speculate_next(prompt: str) -> Optional[tuple]:
+    """Generate a predicted user argument and a counter to it"""
+    try:
+        text = await _generate(prompt)
+    except Exception as e:
+        logger.warning(f"Speculative generation failed: {e}")
+        return None
+    
+    if not text or "REPLY:" not in text:
+        return None
+    prediction, _, reply = text.partition("REPLY:")
+    prediction = prediction.replace("PREDICTION:", "", 1).strip()
+    reply = reply.strip()
+    if not prediction or not reply:
+        return None
+    
+    embedding = await semantic_cache.embed(prediction)
+    if embedding is None:
+        return None
+    return embedding, reply
+
+def start_speculation(state: dict):
+    """Draft the next counter-argument in the background while the user types"""
+    if not semantic_cache.enabled:
+        return
+    
+    conversation_history = "\n".join([
+        f"{msg['role']}: {msg['content']}"
+        for msg in state["messages"][-5:]
+    ])
+    prompt = SPECULATION_TPL.substitute(
+        instruction=debater_instruction(state),
+        conversation=conversation_history
+    )
+    
+    session_id = state["session_id"]
+    previous = _speculations.pop(session_id, None)
+    if previous is not None:
+        previous[0].cancel()
+    _speculations[session_id] = (asyncio.create_task(_speculate_next(prompt)), time.monotonic())
+    _evict_speculations()
+
+async def take_speculation(session_id: str, message: str) -> Optional[str]:
+    """Return the speculative reply if it anticipated this message, else None"""
+    task = pop_speculation(session_id)
+    if task is None:
+        return None
+    if not task.done():
+        task.cancel()
+        return None
+    if task.cancelled() or task.result() is None:
+        return None
+    
+    predicted, reply = task.result()
+    embedding = await semantic_cache.embed(message)
+    if embedding is None or float(predicted @ embedding) < SPECULATION_THRESHOLD:
+        return None
+    return reply
+
 @app.get("/")
 async def root():
     return {"message": "Multi-Agent Debate System API", "status": "running"}
 
+HEALTH_PROMPT = "Say 'OK' if you work"
+
+# Probes run every few seconds; reuse the last Gemini check for this long
+HEALTH_TTL_SECONDS = 30
+HEALTH_TIMEOUT_SECONDS = 2.0
+
+# Last Gemini check as (healthy, monotonic time checked)
+_health_status: Optional[tuple] = None
+
+async def check_llm_health() -> bool:
+    """Whether Gemini answers a short prompt in time; never raises"""
+    try:
+        response = await asyncio.wait_for(
+            _require_model().generate_content_async(HEALTH_PROMPT),
+            timeout=HEALTH_TIMEOUT_SECONDS
+        )
+        return bool(response.candidates)
+    except asyncio.TimeoutError:
+        logger.error("Health check timed out")
+    except Exception as e:
+        logger.error(f"Health check failed: {e}")
+    return False
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    llm_healthy = False
+    global _health_status
     
-    try:
-        if GEMINI_API_KEY:
-            model = genai.GenerativeModel('gemini-2.5-flash')
-            test_response = model.generate_content("Say 'OK' if you work")
-            llm_healthy = bool(test_response.candidates)
-    except Exception as e:
-        logger.error(f"Health check failed: {e}")
+    llm_healthy = False
+    if GEMINI_API_KEY:
+        now = time.monotonic()
+        if _health_status is not None and now - _health_status[1] < HEALTH_TTL_SECONDS:
+            llm_healthy = _health_status[0]
+        else:
+            llm_healthy = await check_llm_health()
+            _health_status = (llm_healthy, now)
     
     return {
         "status": "healthy",
@@ -85,7 +456,7 @@ async def health_check():
         }
     }
 
-@app.post("/api/debate")
+@app.post("/api/debate", response_model=None)
 async def handle_debate(request: dict):
     """Main debate endpoint"""
     try:
@@ -102,7 +473,7 @@ async def handle_debate(request: dict):
             
     except Exception as e:
         logger.error(f"Debate handling error: {e}", exc_info=True)
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={
                 "success": False,
@@ -111,6 +482,26 @@ async def handle_debate(request: dict):
             }
         )
 
+TOPIC_TPL = Template(dedent("""\
+    Generate a debate topic.
+    
+    Provide just the topic as a clear statement that can be debated (not a question).
+    Example: "Social media companies should be required to fact-check all posts"
+    
+    Category: $category
+    Difficulty: $difficulty
+    
+    Your topic:"""))
+
+WELCOME_TPL = Template(dedent("""\
+    You are a professional debate moderator.
+    
+    Welcome the user and ask them to choose their position (for or against this topic).
+    Be encouraging and explain that you'll take the opposing position.
+    Keep it to 2-3 sentences.
+    
+    The debate topic is: "$topic\""""))
+
 async def start_debate(request: dict):
     """Start a new debate"""
     try:
@@ -125,14 +516,11 @@ async def start_debate(request: dict):
             category = topic_request.get("category", "general")
             difficulty = topic_request.get("difficulty", "moderate")
             
-            prompt = f"""Generate a {difficulty} debate topic about {category}. 
+            prompt = TOPIC_TPL.substitute(category=category, difficulty=difficulty)
             
-            Provide just the topic as a clear statement that can be debated (not a question).
-            Example: "Social media companies should be required to fact-check all posts"
-            
-            Your topic:"""
-            
-            topic = await call_llm(prompt)
+            # Every user picking this category and difficulty would
+            # otherwise get the same cached topic
+            topic = await call_llm(prompt, use_cache=False)
             topic = topic.strip().strip('"').strip("'")
         
         # Create session state
@@ -144,29 +532,26 @@ async def start_debate(request: dict):
             "phase": "setup",
             "current_round": 0,
             "messages": [],
+            "context_summary": "",
+            "user_message_count": 0,
             "created_at": datetime.now().isoformat()
         }
         
         # Generate welcome message
-        welcome_prompt = f"""You are a professional debate moderator. 
-        
-        The debate topic is: "{topic}"
-        
-        Welcome the user and ask them to choose their position (for or against this topic).
-        Be encouraging and explain that you'll take the opposing position.
-        Keep it to 2-3 sentences."""
+        welcome_prompt = WELCOME_TPL.substitute(topic=topic)
         
-        welcome_msg = await call_llm(welcome_prompt)
+        welcome_msg = await cached_call_llm(welcome_prompt, ("welcome", topic))
         
         # Store session
-        active_sessions[session_id] = state
+        await session_store.create(state)
         
         logger.info(f"Started debate session: {session_id} with topic: {topic}")
         
         return {
             "success": True,
             "session_id": session_id,
-            "current_state": state,
+            "current_state": public_state(state, with_messages=False),
+            "new_messages": [],
             "ai_response": {
                 "agent_name": "Moderator",
                 "content": welcome_msg,
@@ -180,194 +565,396 @@ async def start_debate(request: dict):
         logger.error(f"Start debate error: {e}", exc_info=True)
         raise
 
-async def continue_debate(request: dict):
-    """Continue an ongoing debate"""
-    try:
-        session_id = request.get("session_id")
-        user_input = request.get("user_input", {})
-        message = user_input.get("message", "")
-        
-        if not session_id or session_id not in active_sessions:
-            raise HTTPException(status_code=404, detail="Session not found")
-        
-        state = active_sessions[session_id]
-        
-        # Add user message
-        state["messages"].append({
-            "role": "user",
-            "content": message,
-            "timestamp": datetime.now().isoformat()
-        })
-        
-        # Detect position if not set
-        if not state["user_position"]:
-            message_lower = message.lower()
-            if any(word in message_lower for word in ["support", "agree", "for", "yes", "favor"]):
-                state["user_position"] = "for"
-                state["ai_position"] = "against"
-                state["phase"] = "opening"
-                state["current_round"] = 1
-            elif any(word in message_lower for word in ["oppose", "disagree", "against", "no"]):
-                state["user_position"] = "against"
-                state["ai_position"] = "for"
-                state["phase"] = "opening"
-                state["current_round"] = 1
-        
-        # Generate AI response based on context
-        conversation_history = "\n".join([
-            f"{msg['role']}: {msg['content']}" 
-            for msg in state["messages"][-5:]
-        ])
-        
-        # Determine which agent/strategy to use
-        if state["phase"] == "setup":
-            prompt = f"""You are a debate moderator. The user said: "{message}"
-            
-            If they're choosing a position, acknowledge it and begin the debate.
-            If unclear, ask them to clearly state if they are FOR or AGAINST: {state['topic']}"""
-            agent_name = "Moderator"
-            
-        else:
-            # Generate counter-argument
-            ai_stance = "supporting" if state["ai_position"] == "for" else "opposing"
-            
-            prompt = f"""You are a skilled debater {ai_stance} the topic: "{state['topic']}"
+SETUP_TPL = Template(dedent("""\
+    You are a debate moderator.
+    
+    If the user is choosing a position, acknowledge it and begin the debate.
+    If unclear, ask them to clearly state if they are FOR or AGAINST: $topic
+    
+    The user said: "$message\""""))
 
-Your position: {state["ai_position"]}
-User's position: {state["user_position"]}
+TURN_TPL = Template(dedent("""\
+    ${earlier}Recent conversation:
+    $conversation
+    
+    The user just said: "$message"
+    
+    Your response:"""))
 
-Recent conversation:
-{conversation_history}
+TRANSITION_TPL = Template(dedent("""\
+    You are a debate moderator. The user has chosen to argue $user_position the topic: "$topic"
+    
+    Announce the start of the opening round in 1-2 sentences. Note that the AI will argue $ai_position."""))
 
-The user just said: "{message}"
+async def prepare_turn(request: dict) -> dict:
+    """Load the session, record the user's message and build the AI prompt"""
+    session_id = request.get("session_id")
+    user_input = request.get("user_input", {})
+    message = user_input.get("message", "")
+    
+    state = await session_store.get(session_id) if session_id else None
+    if state is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    stored_count = len(state["messages"])
+    
+    # Add user message
+    state["messages"].append({
+        "role": "user",
+        "content": message,
+        "timestamp": time.time_ns()
+    })
+    state["user_message_count"] = state.get("user_message_count", 0) + 1
+    
+    # Detect position if not set
+    position_chosen = False
+    if not state["user_position"]:
+        position = detect_position(message)
+        if position:
+            state["user_position"] = position
+            state["ai_position"] = "against" if position == "for" else "for"
+            state["phase"] = "opening"
+            state["current_round"] = 1
+            
+            # Positions just chosen: the debater instruction is now fixed
+            position_chosen = True
+    
+    # Generate AI response based on context
+    conversation_history = "\n".join([
+        f"{msg['role']}: {msg['content']}" 
+        for msg in state["messages"][-5:]
+    ])
+    
+    # Determine which agent/strategy to use
+    if state["phase"] == "setup":
+        prompt = SETUP_TPL.substitute(topic=state["topic"], message=message)
+        agent_name = "Moderator"
+        
+    else:
+        # Generate counter-argument; the static instruction is sent separately
+        earlier = f"Earlier in the debate: {state['context_summary']}\n\n" if state.get("context_summary") else ""
+        prompt = TURN_TPL.substitute(earlier=earlier, conversation=conversation_history, message=message)
+        agent_name = "Challenger" if state["ai_position"] == "against" else "Advocate"
+    
+    return {
+        "session_id": session_id,
+        "state": state,
+        "message": message,
+        "stored_count": stored_count,
+        "position_chosen": position_chosen,
+        "prompt": prompt,
+        "agent_name": agent_name,
+        "ai_response": None,
+        "announcement": None,
+        "speculative": False,
+        "compaction": start_compaction(state)
+    }
 
-Provide a strong, respectful counter-argument that:
-1. Addresses their specific point
-2. Presents evidence or examples
-3. Uses logical reasoning
-4. Challenges their position constructively
-5. Is 100-200 words
+def is_argument_turn(turn: dict) -> bool:
+    """A regular debater turn: past setup and not the opening transition"""
+    return turn["state"]["phase"] != "setup" and not turn["position_chosen"]
 
-Your response:"""
-            agent_name = "Challenger" if state["ai_position"] == "against" else "Advocate"
-        
-        ai_response = await call_llm(prompt)
-        
-        # Add AI message
+async def generate_turn(turn: dict):
+    """Produce the AI response (and any announcement) for a prepared turn"""
+    state = turn["state"]
+    
+    if state["phase"] == "setup":
+        turn["ai_response"] = await cached_call_llm(
+            turn["prompt"], ("setup", state["topic"]), similar_text=turn["message"]
+        )
+    elif turn["position_chosen"]:
+        # Opening turn: the moderator's announcement is generated alongside it
+        transition_prompt = TRANSITION_TPL.substitute(
+            user_position=state["user_position"].upper(),
+            topic=state["topic"],
+            ai_position=state["ai_position"].upper()
+        )
+        turn["ai_response"], turn["announcement"] = await asyncio.gather(
+            call_debater(state, turn["prompt"]),
+            cached_call_llm(transition_prompt, ("transition", state["topic"], state["user_position"]))
+        )
+    else:
+        turn["ai_response"] = await take_speculation(turn["session_id"], turn["message"])
+        turn["speculative"] = turn["ai_response"] is not None
+        if not turn["speculative"]:
+            turn["ai_response"] = await call_debater(state, turn["prompt"])
+
+async def finish_turn(turn: dict) -> dict:
+    """Record the AI turn, persist the session and build the API response"""
+    session_id = turn["session_id"]
+    state = turn["state"]
+    agent_name = turn["agent_name"]
+    ai_response = turn["ai_response"]
+    announcement = turn["announcement"]
+    
+    if announcement:
         state["messages"].append({
             "role": "ai",
-            "content": ai_response,
-            "agent": agent_name,
-            "timestamp": datetime.now().isoformat()
+            "content": announcement,
+            "agent": "Moderator",
+            "timestamp": time.time_ns()
         })
-        
-        # Update round if needed
-        user_msg_count = len([m for m in state["messages"] if m["role"] == "user"])
-        if user_msg_count > state["current_round"] and state["phase"] != "setup":
-            state["current_round"] = user_msg_count
-        
-        logger.info(f"Continued debate session: {session_id}, round: {state['current_round']}")
-        
-        return {
-            "success": True,
-            "session_id": session_id,
-            "current_state": state,
-            "ai_response": {
-                "agent_name": agent_name,
-                "content": ai_response,
-                "reasoning": f"Generated {agent_name} response to user's argument",
-                "confidence": 0.85,
-                "metadata": {"round": state["current_round"]}
-            }
+    
+    # Add AI message
+    state["messages"].append({
+        "role": "ai",
+        "content": ai_response,
+        "agent": agent_name,
+        "timestamp": time.time_ns()
+    })
+    
+    content = f"{announcement}\n\n{ai_response}" if announcement else ai_response
+    
+    # Update round if needed
+    user_msg_count = state["user_message_count"]
+    if user_msg_count > state["current_round"] and state["phase"] != "setup":
+        state["current_round"] = user_msg_count
+    
+    new_messages = state["messages"][turn["stored_count"]:]
+    await session_store.append_messages(session_id, *new_messages)
+    await apply_compaction(state, turn["compaction"])
+    await session_store.save(state)
+    
+    if state["phase"] != "setup":
+        start_speculation(state)
+    
+    logger.info(f"Continued debate session: {session_id}, round: {state['current_round']}")
+    
+    return {
+        "success": True,
+        "session_id": session_id,
+        "current_state": public_state(state, with_messages=False),
+        "new_messages": public_messages(new_messages),
+        "ai_response": {
+            "agent_name": agent_name,
+            "content": content,
+            "reasoning": f"Generated {agent_name} response to user's argument",
+            "confidence": 0.85,
+            "metadata": {"round": state["current_round"], "speculative": turn["speculative"]}
         }
+    }
+
+async def continue_debate(request: dict):
+    """Continue an ongoing debate"""
+    try:
+        turn = await prepare_turn(request)
+        await generate_turn(turn)
+        return await finish_turn(turn)
         
     except Exception as e:
         logger.error(f"Continue debate error: {e}", exc_info=True)
         raise
 
-async def end_debate(request: dict):
-    """End debate and provide evaluation"""
-    try:
-        session_id = request.get("session_id")
-        
-        if not session_id or session_id not in active_sessions:
-            raise HTTPException(status_code=404, detail="Session not found")
-        
-        state = active_sessions[session_id]
-        state["phase"] = "complete"
-        
-        # Generate evaluation
-        conversation = "\n\n".join([
-            f"{msg['role'].upper()}: {msg['content']}"
-            for msg in state["messages"]
-        ])
-        
-        eval_prompt = f"""You are an expert debate evaluator. Provide comprehensive feedback on this debate.
-
-Topic: {state['topic']}
-User's Position: {state['user_position']}
-Rounds: {state['current_round']}
-
-Full Conversation:
-{conversation}
+# Evaluations run in the background; the task is referenced here until done
+_evaluations: Dict[str, asyncio.Task] = {}
 
-Provide evaluation covering:
+# A pending evaluation older than this is assumed lost with its worker
+EVALUATION_STALE_SECONDS = int(os.getenv("EVALUATION_STALE_SECONDS", "300"))
 
-**Argument Quality**
-- Assess the strength of the user's main arguments
-- Note use of evidence and examples
+def evaluation_stale(evaluation: dict) -> bool:
+    """Whether a pending evaluation has outlived any task that could finish it"""
+    if evaluation.get("status") != "pending":
+        return False
+    # Wall-clock time, since the evaluation may have started on another worker
+    return time.time() - evaluation.get("started_at", 0) > EVALUATION_STALE_SECONDS
 
-**Debate Skills**
-- Structure and organization
-- Response to counter-arguments
-- Persuasiveness
-
-**Strengths**
-- What the user did well
-- Effective techniques used
+def evaluation_response(evaluation: str) -> dict:
+    """The Evaluator's reply, as returned once the evaluation is ready"""
+    return {
+        "agent_name": "Evaluator",
+        "content": evaluation,
+        "reasoning": "Comprehensive debate evaluation completed",
+        "confidence": 0.9,
+        "metadata": {"type": "evaluation"}
+    }
 
-**Areas for Improvement**  
-- Specific weaknesses
-- Suggestions for stronger arguments
+async def evaluation_section(debate: dict, title: str, points: str) -> str:
+    """One rubric section of the evaluation; raises when Gemini does not answer"""
+    text = await _generate(EVALUATION_TPL.substitute(debate, title=title, points=points))
+    if not text:
+        raise RuntimeError(f"No response for the {title} section")
+    return text
 
-**Overall Summary**
-- Brief performance summary
-- Encouragement and next steps
+async def generate_evaluation(session_id: str, state: dict):
+    """Evaluate a finished debate and store the result in the session"""
+    try:
+        # Evaluate against the full transcript, not just the live window
+        messages = await session_store.history(session_id)
+        if messages is None:
+            messages = state["messages"]
+        conversation = "".join(map(transcript_entry, messages)).rstrip()
+        
+        debate = {
+            "topic": state["topic"],
+            "user_position": state["user_position"],
+            "rounds": state["current_round"],
+            "conversation": conversation
+        }
+        
+        # Rubric sections are independent, so generate them concurrently.
+        # Any failed section fails the evaluation, so it can be retried.
+        sections = await asyncio.gather(*[
+            evaluation_section(debate, title, points)
+            for title, points in EVALUATION_SECTIONS
+        ])
+        state["evaluation"] = {
+            "status": "complete",
+            "content": "\n\n".join(
+                f"**{title}**\n{text.strip()}"
+                for (title, _), text in zip(EVALUATION_SECTIONS, sections)
+            )
+        }
+        logger.info(f"Evaluated debate session: {session_id}")
+        
+    except Exception as e:
+        logger.error(f"Evaluation error: {e}", exc_info=True)
+        state["evaluation"] = {"status": "failed", "error": str(e)}
+    
+    finally:
+        _evaluations.pop(session_id, None)
+    
+    await session_store.save(state)
 
-Keep feedback constructive, specific, and encouraging."""
+async def end_debate(request: dict):
+    """End the debate and start its evaluation in the background"""
+    try:
+        session_id = request.get("session_id")
+        
+        state = await session_store.get(session_id) if session_id else None
+        if state is None:
+            raise HTTPException(status_code=404, detail="Session not found")
+        
+        pending = pop_speculation(session_id)
+        if pending is not None:
+            pending.cancel()
         
-        evaluation = await call_llm(eval_prompt)
+        # Start at most one evaluation; a failed or lost one is retried
+        evaluation = state.get("evaluation", {})
+        if evaluation.get("status") in (None, "failed") or (
+            session_id not in _evaluations and evaluation_stale(evaluation)
+        ):
+            state["phase"] = "complete"
+            state["evaluation"] = {"status": "pending", "started_at": time.time()}
+            await session_store.save(state)
+            _evaluations[session_id] = asyncio.create_task(generate_evaluation(session_id, state))
         
         logger.info(f"Ended debate session: {session_id}")
         
-        return {
-            "success": True,
-            "session_id": session_id,
-            "current_state": state,
-            "ai_response": {
-                "agent_name": "Evaluator",
-                "content": evaluation,
-                "reasoning": "Comprehensive debate evaluation completed",
-                "confidence": 0.9,
-                "metadata": {"type": "evaluation"}
+        return ORJSONResponse(
+            status_code=202,
+            content={
+                "success": True,
+                "session_id": session_id,
+                "current_state": public_state(state, with_messages=False),
+                "new_messages": [],
+                "evaluation": {
+                    "status": state["evaluation"]["status"],
+                    "url": f"/api/session/{session_id}/evaluation"
+                }
             }
-        }
+        )
         
     except Exception as e:
         logger.error(f"End debate error: {e}", exc_info=True)
         raise
 
+def sse_event(payload: dict, event: Optional[str] = None) -> str:
+    """Format one Server-Sent Event with a JSON payload"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {orjson.dumps(payload).decode()}\n\n"
+
+@app.post("/api/debate/stream")
+async def stream_debate(request: dict):
+    """Continue a debate, streaming the AI turn as Server-Sent Events.
+
+    Emits ``data: {"delta": ...}`` events as text arrives, then a ``done``
+    event carrying the same payload the JSON endpoint returns.
+    """
+    # Raised before streaming starts, so a missing session is still a plain 404
+    turn = await prepare_turn(request)
+    
+    async def events():
+        try:
+            if is_argument_turn(turn):
+                turn["ai_response"] = await take_speculation(turn["session_id"], turn["message"])
+                turn["speculative"] = turn["ai_response"] is not None
+            
+            if is_argument_turn(turn) and not turn["speculative"]:
+                parts = []
+                async for text in stream_debater(turn["state"], turn["prompt"]):
+                    parts.append(text)
+                    yield sse_event({"delta": text})
+                turn["ai_response"] = "".join(parts)
+            else:
+                if turn["ai_response"] is None:
+                    await generate_turn(turn)
+                content = turn["ai_response"]
+                if turn["announcement"]:
+                    content = f"{turn['announcement']}\n\n{content}"
+                yield sse_event({"delta": content})
+            
+            yield sse_event(await finish_turn(turn), event="done")
+            
+        except Exception as e:
+            logger.error(f"Stream debate error: {e}", exc_info=True)
+            yield sse_event({"success": False, "error": str(e)}, event="error")
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
 @app.get("/api/session/{session_id}")
 async def get_session(session_id: str):
     """Get session state"""
-    if session_id not in active_sessions:
+    state = await session_store.get(session_id)
+    if state is None:
         raise HTTPException(status_code=404, detail="Session not found")
     
     return {
         "session_id": session_id,
-        "state": active_sessions[session_id]
+        "state": public_state(state)
     }
 
+@app.get("/api/session/{session_id}/history")
+async def get_session_history(session_id: str):
+    """Full message transcript of a session"""
+    messages = await session_store.history(session_id)
+    if messages is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    return {
+        "session_id": session_id,
+        "messages": public_messages(messages)
+    }
+
+@app.get("/api/session/{session_id}/evaluation")
+async def get_session_evaluation(session_id: str):
+    """Status of a session's evaluation, with the Evaluator's reply once complete"""
+    state = await session_store.get(session_id)
+    if state is None or "evaluation" not in state:
+        raise HTTPException(status_code=404, detail="Evaluation not found")
+    
+    evaluation = state["evaluation"]
+    if session_id not in _evaluations and evaluation_stale(evaluation):
+        # Reported as failed so the client stops waiting; ending the debate
+        # again restarts it
+        evaluation = {"status": "failed", "error": "Evaluation timed out"}
+    
+    result = {"session_id": session_id, "status": evaluation["status"]}
+    if evaluation["status"] == "complete":
+        result["ai_response"] = evaluation_response(evaluation["content"])
+    elif evaluation["status"] == "failed":
+        result["error"] = evaluation["error"]
+    return result
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # Sessions are only shared between processes through Redis, so without
+    # it every request must reach the single worker that holds them
+    workers = (os.cpu_count() or 1) if os.getenv("REDIS_URL") else 1
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=workers,
+        loop="uvloop",
+        http="httptools",
+        log_level="warning"
+    )
\ No newline at end of file
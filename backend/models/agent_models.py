@@ -0,0 +1,74 @@
+"""Data models used internally by the agents"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+from pydantic import BaseModel
+
+class ControllerDecision(BaseModel):
+    """Structured decision returned by the Controller Agent.
+
+    Used as a Gemini response schema, so every field is required
+    (the API rejects schema defaults).
+    """
+    action: str
+    agent_to_call: str
+    specific_task: str
+    confidence: float
+    reasoning: str
+
+# Context fields rendered into the shared prompt prefix rather than each
+# agent's context JSON; they change at most a few times per session
+PROMPT_PREFIX_FIELDS = ("topic", "user_position", "ai_position", "phase")
+
+@dataclass(frozen=True, slots=True)
+class ContextView:
+    """Read-only snapshot of the debate fields agents consume.
+
+    Built once per controller tick and shared by every agent called in it.
+    """
+    topic: str = ""
+    user_position: str = ""
+    ai_position: str = ""
+    current_round: int = 0
+    phase: str = ""
+    recent_messages: Tuple[Dict[str, Any], ...] = ()
+    
+    @classmethod
+    def from_context(cls, context: Dict[str, Any]) -> "ContextView":
+        return cls(
+            topic=context.get("topic", ""),
+            user_position=context.get("user_position", ""),
+            ai_position=context.get("ai_position", ""),
+            current_round=context.get("current_round", 0),
+            phase=context.get("phase", ""),
+            recent_messages=tuple(context.get("recent_messages", ()))
+        )
+
+@dataclass(slots=True)
+class AgentResult:
+    """Result of one agent turn.
+
+    Agents and the controller pass these around by attribute; the dict form
+    is only produced at the API boundary via ``to_dict``.
+    """
+    agent_name: str
+    content: str
+    reasoning: str = ""
+    confidence: float = 0.8
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    # Set by the controller on the response it returns
+    controller_reasoning: Optional[str] = None
+    action_taken: Optional[str] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        result = {
+            "agent_name": self.agent_name,
+            "content": self.content,
+            "reasoning": self.reasoning,
+            "confidence": self.confidence,
+            "metadata": self.metadata
+        }
+        if self.action_taken is not None:
+            result["controller_reasoning"] = self.controller_reasoning
+            result["action_taken"] = self.action_taken
+        return result
@@ -1,9 +1,15 @@
 """Data models for the debate system"""
 
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field
+from typing import Deque, List, Optional, Dict, Any, Tuple
+from collections import deque
+from pydantic import BaseModel, Field, PrivateAttr, computed_field
 from datetime import datetime
 from enum import Enum
+import time
+import uuid
+
+# Number of latest messages included in agent context
+RECENT_MESSAGE_WINDOW = 5
 
 class DebatePhase(str, Enum):
     SETUP = "setup"
@@ -26,12 +32,22 @@ class ArgumentStrength(str, Enum):
     EXCELLENT = "excellent"
 
 class DebateMessage(BaseModel):
-    id: str = Field(default_factory=lambda: str(datetime.now().timestamp()))
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex[:12])
     role: MessageRole
     content: str
-    timestamp: datetime = Field(default_factory=datetime.now)
+    # Epoch nanoseconds; formatted only when the message is serialized
+    timestamp: int = Field(default_factory=time.time_ns)
     agent_used: Optional[str] = None
     metadata: Dict[str, Any] = Field(default_factory=dict)
+    
+    @computed_field
+    @property
+    def timestamp_iso(self) -> str:
+        return datetime.fromtimestamp(self.timestamp / 1e9).isoformat()
+    
+    def as_context(self) -> Dict[str, Any]:
+        """Compact form of the message included in agent context"""
+        return {"role": self.role.value, "content": self.content, "agent": self.agent_used}
 
 class DebateState(BaseModel):
     session_id: str
@@ -41,11 +57,29 @@ class DebateState(BaseModel):
     current_round: int = 0
     phase: DebatePhase = DebatePhase.SETUP
     messages: List[DebateMessage] = Field(default_factory=list)
+    # Per-role message counts, kept in step by DebateService._append_message
+    user_msg_count: int = 0
+    ai_msg_count: int = 0
     context_summary: str = ""
     user_score: int = 0
     ai_score: int = 0
     created_at: datetime = Field(default_factory=datetime.now)
     updated_at: datetime = Field(default_factory=datetime.now)
+    # Context form of the latest messages, each built once when its message is appended
+    _recent_window: Deque[Dict[str, Any]] = PrivateAttr(
+        default_factory=lambda: deque(maxlen=RECENT_MESSAGE_WINDOW)
+    )
+    # Recent-message list handed to agents, with the message count it was built at
+    _recent_messages: Optional[Tuple[int, List[Dict[str, Any]]]] = PrivateAttr(default=None)
+    # Shared prompt prefix text, with the field values it was built from
+    _prompt_prefix: Optional[Tuple[Tuple[str, ...], str]] = PrivateAttr(default=None)
+    
+    def model_post_init(self, __context: Any) -> None:
+        self._recent_window.extend(msg.as_context() for msg in self.messages[-RECENT_MESSAGE_WINDOW:])
+        # States rebuilt from a message list start with their counters in sync
+        if self.messages and not (self.user_msg_count or self.ai_msg_count):
+            self.user_msg_count = sum(msg.role == MessageRole.USER for msg in self.messages)
+            self.ai_msg_count = sum(msg.role == MessageRole.AI for msg in self.messages)
 
 class TopicRequest(BaseModel):
     category: Optional[str] = None
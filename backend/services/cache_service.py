@@ -0,0 +1,165 @@
+"""Response caching for LLM calls"""
+
+from collections import OrderedDict
+from typing import Hashable, List, Optional, Tuple
+import asyncio
+import hashlib
+import logging
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class ExactCache:
+    """Process-local LRU mapping exact prompt text to an LLM response.
+
+    Keys are 16-byte BLAKE2b digests, so long prompts are not kept in memory.
+    With ``ttl`` set, entries also expire that many seconds after being stored.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # Response and monotonic expiry time (0 when entries do not expire)
+        self._entries: "OrderedDict[bytes, Tuple[str, float]]" = OrderedDict()
+
+    @staticmethod
+    def _key(prompt: str) -> bytes:
+        return hashlib.blake2b(prompt.encode(), digest_size=16).digest()
+
+    def get(self, prompt: str) -> Optional[str]:
+        """Return the cached response for this exact prompt, if any"""
+
+        key = self._key(prompt)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        response, expires_at = entry
+        if expires_at and expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    def set(self, prompt: str, response: str) -> None:
+        """Store a response, evicting the least recently used entry when full"""
+
+        key = self._key(prompt)
+        expires_at = time.monotonic() + self.ttl if self.ttl else 0.0
+        self._entries[key] = (response, expires_at)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+class SemanticCache:
+    """In-memory semantic cache mapping prompts to LLM responses.
+
+    Entries are partitioned by an exact-match namespace (e.g. agent role plus
+    normalized context). Within a namespace, a lookup hits when the cosine
+    similarity between prompt embeddings reaches ``threshold``.
+    """
+
+    EMBEDDING_MEMO_SIZE = 64
+
+    def __init__(self, model_name: str, threshold: float = 0.85,
+                 max_namespaces: int = 256, max_entries_per_namespace: int = 16):
+        self.model_name = model_name
+        self.threshold = threshold
+        self.max_namespaces = max_namespaces
+        self.max_entries_per_namespace = max_entries_per_namespace
+        self._encoder = None
+        self._encoder_lock = asyncio.Lock()
+        self._disabled = False
+        self._entries: "OrderedDict[Hashable, List[Tuple[np.ndarray, str]]]" = OrderedDict()
+        self._embeddings: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        """False once the embedding model has failed to load"""
+        return not self._disabled
+
+    async def embed(self, text: str) -> Optional[np.ndarray]:
+        """Unit-normalized embedding of text, or None when the cache is disabled"""
+        if self._disabled:
+            return None
+        return await self._embed(text)
+
+    async def get(self, namespace: Hashable, text: str) -> Optional[str]:
+        """Return a cached response for a semantically similar prompt, if any"""
+
+        entries = self._entries.get(namespace)
+        if not entries or self._disabled:
+            return None
+
+        embedding = await self._embed(text)
+        if embedding is None:
+            return None
+
+        matrix = np.stack([entry[0] for entry in entries])
+        scores = matrix @ embedding
+        best = int(np.argmax(scores))
+
+        if scores[best] >= self.threshold:
+            # A concurrent set may have evicted the namespace while embedding
+            if namespace in self._entries:
+                self._entries.move_to_end(namespace)
+            return entries[best][1]
+        return None
+
+    async def set(self, namespace: Hashable, text: str, response: str) -> None:
+        """Store a response under the given namespace and prompt"""
+
+        if self._disabled:
+            return
+
+        embedding = await self._embed(text)
+        if embedding is None:
+            return
+
+        entries = self._entries.setdefault(namespace, [])
+        entries.append((embedding, response))
+        if len(entries) > self.max_entries_per_namespace:
+            del entries[0]
+
+        self._entries.move_to_end(namespace)
+        while len(self._entries) > self.max_namespaces:
+            self._entries.popitem(last=False)
+
+    async def _embed(self, text: str) -> Optional[np.ndarray]:
+        """Embed text off the event loop, memoizing recent embeddings"""
+
+        embedding = self._embeddings.get(text)
+        if embedding is not None:
+            return embedding
+
+        encoder = await self._get_encoder()
+        if encoder is None:
+            return None
+
+        embedding = await asyncio.to_thread(
+            encoder.encode, text, normalize_embeddings=True
+        )
+        embedding = np.asarray(embedding, dtype=np.float32)
+
+        self._embeddings[text] = embedding
+        if len(self._embeddings) > self.EMBEDDING_MEMO_SIZE:
+            self._embeddings.popitem(last=False)
+        return embedding
+
+    async def _get_encoder(self):
+        """Lazily load the sentence-transformer model"""
+
+        if self._encoder is not None or self._disabled:
+            return self._encoder
+
+        async with self._encoder_lock:
+            if self._encoder is None and not self._disabled:
+                try:
+                    from sentence_transformers import SentenceTransformer
+                    self._encoder = await asyncio.to_thread(SentenceTransformer, self.model_name)
+                except Exception as e:
+                    logger.warning(f"Semantic cache disabled, embedding model unavailable: {e}")
+                    self._disabled = True
+
+        return self._encoder
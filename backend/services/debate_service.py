@@ -1,15 +1,17 @@
 """Core debate service that orchestrates all agents"""
 
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional
 import asyncio
 import logging
 from datetime import datetime
+from string import Template
 
 from models.debate_models import (
     DebateState, DebateResponse, DebatePhase, MessageRole, 
     DebateMessage, TopicRequest, AgentResponse
 )
 from agents.base_agent import AgentRole
+from models.agent_models import PROMPT_PREFIX_FIELDS, AgentResult, ContextView
 from agents.controller_agent import ControllerAgent
 from agents.moderator_agent import ModeratorAgent
 from agents.topic_generator import TopicGeneratorAgent
@@ -18,9 +20,37 @@ from agents.memory_agent import MemoryAgent
 from agents.feedback_agent import FeedbackAgent
 from agents.coach_agent import CoachAgent
 from services.llm_service import LLMService
+from utils.position import detect_position
 
 logger = logging.getLogger(__name__)
 
+# Reply once the user's position is known; choosing sides needs no LLM call
+POSITIONS_SET_TPL = Template(
+    "Great — you'll argue $user_position. I'll argue $ai_position. "
+    "Please give your opening statement."
+)
+
+# Messages and responses below are built from values this service produced
+# itself, so they skip pydantic validation; request models are still
+# validated at the API boundary
+
+def _msg(role: MessageRole, content: str, agent: Optional[str] = None,
+         metadata: Optional[Dict] = None) -> DebateMessage:
+    """Build a DebateMessage from trusted internal values"""
+    fields = {"role": role, "content": content, "agent_used": agent}
+    if metadata is not None:
+        fields["metadata"] = metadata
+    return DebateMessage.model_construct(**fields)
+
+def _success(session_id: str, state: DebateState, result: AgentResult) -> DebateResponse:
+    """Successful DebateResponse carrying an agent's result"""
+    return DebateResponse.model_construct(
+        success=True,
+        session_id=session_id,
+        current_state=state,
+        ai_response=AgentResponse.model_construct(**result.to_dict())
+    )
+
 class DebateService:
     """Core service that manages the entire debate system"""
     
@@ -28,6 +58,7 @@ class DebateService:
         self.llm_service = llm_service
         self.agents: Dict[AgentRole, any] = {}
         self.controller_agent: Optional[ControllerAgent] = None
+        self._ctx_builders = self._context_builders()
     
     async def initialize(self):
         """Initialize all agents"""
@@ -78,15 +109,15 @@ class DebateService:
                     context["topic_request"] = topic_request.dict()
                 
                 response = await self.controller_agent.execute("Generate a debate topic", context)
-                debate_state.topic = response.get("content", "Should AI be regulated more strictly?")
+                debate_state.topic = response.content or "Should AI be regulated more strictly?"
             
             # Add system message
-            system_msg = DebateMessage(
-                role=MessageRole.SYSTEM,
-                content=f"Debate topic: {debate_state.topic}",
-                agent_used="topic_generator"
+            system_msg = _msg(
+                MessageRole.SYSTEM,
+                f"Debate topic: {debate_state.topic}",
+                agent="topic_generator"
             )
-            debate_state.messages.append(system_msg)
+            self._append_message(debate_state, system_msg)
             
             # Get moderator introduction
             context = self._build_context(debate_state)
@@ -96,20 +127,15 @@ class DebateService:
             )
             
             # Add moderator message
-            moderator_msg = DebateMessage(
-                role=MessageRole.AI,
-                content=moderator_response.get("content", "Welcome to the debate!"),
-                agent_used="moderator"
+            moderator_msg = _msg(
+                MessageRole.AI,
+                moderator_response.content or "Welcome to the debate!",
+                agent="moderator"
             )
-            debate_state.messages.append(moderator_msg)
+            self._append_message(debate_state, moderator_msg)
             debate_state.updated_at = datetime.now()
             
-            return DebateResponse(
-                success=True,
-                session_id=session_id,
-                current_state=debate_state,
-                ai_response=AgentResponse(**moderator_response)
-            )
+            return _success(session_id, debate_state, moderator_response)
             
         except Exception as e:
             logger.error(f"Failed to start debate: {e}")
@@ -125,53 +151,47 @@ class DebateService:
         """Continue an ongoing debate"""
         try:
             # Add user message to state
-            user_msg = DebateMessage(
-                role=MessageRole.USER,
-                content=user_message
-            )
-            current_state.messages.append(user_msg)
+            user_msg = _msg(MessageRole.USER, user_message)
+            self._append_message(current_state, user_msg)
             
             # Update user position if not set and we can infer it
+            positions_set = False
             if not current_state.user_position and current_state.phase == DebatePhase.SETUP:
-                if any(word in user_message.lower() for word in ["support", "agree", "for", "yes"]):
-                    current_state.user_position = "for"
-                    current_state.ai_position = "against"
-                elif any(word in user_message.lower() for word in ["oppose", "disagree", "against", "no"]):
-                    current_state.user_position = "against"
-                    current_state.ai_position = "for"
-                
-                if current_state.user_position:
+                position = detect_position(user_message)
+                if position:
+                    current_state.user_position = position
+                    current_state.ai_position = "against" if position == "for" else "for"
                     current_state.phase = DebatePhase.OPENING
                     current_state.current_round = 1
+                    positions_set = True
             
-            # Build context for controller
-            context = self._build_context(current_state)
-            context["user_message"] = user_message
-            
-            # Let controller decide what to do
-            controller_response = await self.controller_agent.execute(user_message, context)
+            if positions_set:
+                # SETUP -> OPENING is a fixed transition; acknowledge it locally
+                controller_response = self._positions_set_response(current_state)
+            else:
+                # Build context for controller
+                context = self._build_context(current_state)
+                context["user_message"] = user_message
+                
+                # Let controller decide what to do
+                controller_response = await self.controller_agent.execute(user_message, context)
             
             # Add AI response to messages
-            ai_msg = DebateMessage(
-                role=MessageRole.AI,
-                content=controller_response.get("content", "I need to think about that..."),
-                agent_used=controller_response.get("agent_name", "controller"),
-                metadata=controller_response.get("metadata", {})
+            ai_msg = _msg(
+                MessageRole.AI,
+                controller_response.content or "I need to think about that...",
+                agent=controller_response.agent_name or "controller",
+                metadata=controller_response.metadata
             )
-            current_state.messages.append(ai_msg)
+            self._append_message(current_state, ai_msg)
             current_state.updated_at = datetime.now()
             
             # Update round if we're in active debate
             if current_state.phase in [DebatePhase.OPENING, DebatePhase.REBUTTAL]:
-                if len([msg for msg in current_state.messages if msg.role == MessageRole.USER]) > current_state.current_round:
+                if current_state.user_msg_count > current_state.current_round:
                     current_state.current_round += 1
             
-            return DebateResponse(
-                success=True,
-                session_id=session_id,
-                current_state=current_state,
-                ai_response=AgentResponse(**controller_response)
-            )
+            return _success(session_id, current_state, controller_response)
             
         except Exception as e:
             logger.error(f"Failed to continue debate: {e}")
@@ -187,29 +207,35 @@ class DebateService:
         try:
             current_state.phase = DebatePhase.EVALUATION
             
-            # Get feedback from feedback agent
+            # The evaluation and the memory summary are independent, so both
+            # LLM calls are in flight at once
             context = self._build_context(current_state)
-            feedback_response = await self.agents[AgentRole.FEEDBACK].execute(
-                "Evaluate the entire debate and provide comprehensive feedback",
-                context
+            feedback_response, summary_response = await asyncio.gather(
+                self.agents[AgentRole.FEEDBACK].execute(
+                    "Evaluate the entire debate and provide comprehensive feedback",
+                    context
+                ),
+                self.agents[AgentRole.MEMORY].execute("Summarize the debate", context),
+                return_exceptions=True
             )
+            if isinstance(feedback_response, Exception):
+                raise feedback_response
+            if isinstance(summary_response, Exception):
+                logger.warning(f"Debate summary failed: {summary_response}")
+            elif "summarized_entries" in summary_response.metadata:
+                current_state.context_summary = summary_response.content
             
             # Add evaluation message
-            eval_msg = DebateMessage(
-                role=MessageRole.AI,
-                content=feedback_response.get("content", "Thank you for the engaging debate!"),
-                agent_used="feedback"
+            eval_msg = _msg(
+                MessageRole.AI,
+                feedback_response.content or "Thank you for the engaging debate!",
+                agent="feedback"
             )
-            current_state.messages.append(eval_msg)
+            self._append_message(current_state, eval_msg)
             current_state.phase = DebatePhase.COMPLETE
             current_state.updated_at = datetime.now()
             
-            return DebateResponse(
-                success=True,
-                session_id=session_id,
-                current_state=current_state,
-                ai_response=AgentResponse(**feedback_response)
-            )
+            return _success(session_id, current_state, feedback_response)
             
         except Exception as e:
             logger.error(f"Failed to end debate: {e}")
@@ -220,20 +246,101 @@ class DebateService:
                 error=str(e)
             )
     
-    def _build_context(self, state: DebateState) -> Dict:
-        """Build context dictionary for agents"""
+    def _positions_set_response(self, state: DebateState) -> AgentResult:
+        """Moderator acknowledgement of the sides chosen in the SETUP phase"""
+        return AgentResult(
+            agent_name="moderator_fast_path",
+            content=POSITIONS_SET_TPL.substitute(
+                user_position=state.user_position, ai_position=state.ai_position
+            ),
+            reasoning="Positions inferred from the user's message",
+            confidence=1.0,
+            metadata={"phase": state.phase.value}
+        )
+    
+    def _static_context(self, state: DebateState) -> Dict:
+        """Context fields that stay fixed for the session once positions are chosen"""
         return {
             "session_id": state.session_id,
             "topic": state.topic,
             "user_position": state.user_position,
-            "ai_position": state.ai_position,
+            "ai_position": state.ai_position
+        }
+    
+    def _context_builders(self) -> Dict[DebatePhase, Callable[[DebateState], Dict]]:
+        """
+        Context builder for each phase
+        
+        SETUP turns only pick topics and sides, so their context carries no
+        messages; the evaluation reads the whole transcript rather than the
+        recent window. Every other phase gets the recent window.
+        """
+        builders = {phase: self._debate_context for phase in DebatePhase}
+        builders[DebatePhase.SETUP] = self._phase_context
+        builders[DebatePhase.EVALUATION] = self._evaluation_context
+        return builders
+    
+    def _phase_context(self, state: DebateState) -> Dict:
+        """Context fields every phase shares"""
+        return {
+            **self._static_context(state),
             "current_round": state.current_round,
             "phase": state.phase.value,
-            "recent_messages": [
-                {"role": msg.role.value, "content": msg.content, "agent": msg.agent_used}
-                for msg in state.messages[-5:]  # Last 5 messages for context
-            ],
             "total_messages": len(state.messages),
-            "user_messages": len([msg for msg in state.messages if msg.role == MessageRole.USER]),
-            "ai_messages": len([msg for msg in state.messages if msg.role == MessageRole.AI])
-        }
\ No newline at end of file
+            "user_messages": state.user_msg_count,
+            "ai_messages": state.ai_msg_count
+        }
+    
+    def _debate_context(self, state: DebateState) -> Dict:
+        context = self._phase_context(state)
+        context["recent_messages"] = self._recent_messages(state)
+        return context
+    
+    def _evaluation_context(self, state: DebateState) -> Dict:
+        context = self._phase_context(state)
+        context["recent_messages"] = [msg.as_context() for msg in state.messages]
+        return context
+    
+    def _build_context(self, state: DebateState) -> Dict:
+        """Build context dictionary for agents, with its shared ContextView"""
+        context = self._ctx_builders[state.phase](state)
+        context["_prompt_prefix"] = self._build_prompt_prefix(state)
+        context["_view"] = ContextView.from_context(context)
+        return context
+    
+    def _build_prompt_prefix(self, state: DebateState) -> str:
+        """
+        Shared prompt prefix for the session's agent calls
+        
+        The prefix fields are rendered in a fixed line format ahead of each
+        agent's per-call context, so the leading bytes of every prompt stay
+        identical between turns and provider-side prefix caching can hit.
+        The text is rebuilt only when one of the fields changes.
+        """
+        values = (state.topic, state.user_position, state.ai_position, state.phase.value)
+        cached = state._prompt_prefix
+        if cached is None or cached[0] != values:
+            text = "\n".join(
+                f"{name}: {value}" for name, value in zip(PROMPT_PREFIX_FIELDS, values)
+            )
+            cached = (values, text)
+            state._prompt_prefix = cached
+        return cached[1]
+    
+    def _recent_messages(self, state: DebateState) -> List[Dict]:
+        """Last messages in agent form, relisted only after a message is added"""
+        count = len(state.messages)
+        cached = state._recent_messages
+        if cached is None or cached[0] != count:
+            cached = (count, list(state._recent_window))
+            state._recent_messages = cached
+        return cached[1]
+    
+    def _append_message(self, state: DebateState, msg: DebateMessage):
+        """Add a message to the state, keeping its counters and context window current"""
+        state.messages.append(msg)
+        state._recent_window.append(msg.as_context())
+        if msg.role == MessageRole.USER:
+            state.user_msg_count += 1
+        elif msg.role == MessageRole.AI:
+            state.ai_msg_count += 1
\ No newline at end of file
@@ -1,12 +1,35 @@
 """LLM Service for integrating with Google Gemini"""
 
 import google.generativeai as genai
-from typing import Optional, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import Optional, Dict, Any, AsyncIterator, Type
+from pydantic import BaseModel
+import asyncio
 import logging
+import re
+import orjson
+from services.cache_service import ExactCache
 from utils.config import Config
 
 logger = logging.getLogger(__name__)
 
+# Markdown code fences Gemini often wraps JSON replies in
+_JSON_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$", re.MULTILINE)
+
+@lru_cache(maxsize=32)
+def _generation_config(temperature: float, max_tokens: int,
+                       schema: Optional[Type[BaseModel]] = None) -> genai.types.GenerationConfig:
+    """Shared GenerationConfig per setting; calls almost always use the defaults"""
+    if schema is None:
+        return genai.types.GenerationConfig(temperature=temperature, max_output_tokens=max_tokens)
+    return genai.types.GenerationConfig(
+        temperature=temperature,
+        max_output_tokens=max_tokens,
+        response_mime_type="application/json",
+        response_schema=schema,
+    )
+
 class LLMService:
     """Service for interacting with LLM providers"""
     
@@ -14,29 +37,88 @@ class LLMService:
         self.api_key = api_key or Config.GEMINI_API_KEY
         self._configure_genai()
         self.model = genai.GenerativeModel(Config.DEFAULT_MODEL)
+        self._models_by_system: Dict[str, genai.GenerativeModel] = {}
+        # Threads for blocking SDK calls. Generation goes through the SDK's
+        # native async client; this pool only serves the synchronous paths,
+        # and max_workers caps how many of them can be in flight at once
+        self._executor = ThreadPoolExecutor(
+            max_workers=Config.LLM_MAX_WORKERS,
+            thread_name_prefix="llm"
+        )
+        # Requests from every session share the SDK's client, so they are
+        # already issued in parallel; this only caps how many are in flight
+        # to stay under the project's Gemini rate limit
+        self._in_flight = asyncio.Semaphore(Config.LLM_MAX_IN_FLIGHT)
+        # Completions of calls that opted into reuse, keyed by the full request
+        self._response_cache = ExactCache(Config.RESPONSE_CACHE_SIZE, ttl=Config.RESPONSE_CACHE_TTL)
         
     def _configure_genai(self):
         """Configure Google Generative AI"""
         genai.configure(api_key=self.api_key)
+    
+    def _get_model(self, system: Optional[str]) -> genai.GenerativeModel:
+        """Get a model bound to the given system instruction"""
+        if not system:
+            return self.model
+        
+        model = self._models_by_system.get(system)
+        if model is None:
+            model = genai.GenerativeModel(Config.DEFAULT_MODEL, system_instruction=system)
+            self._models_by_system[system] = model
+        return model
         
+    async def _generate(self, system: Optional[str], prompt: str, generation_config,
+                        stream: bool = False):
+        """One Gemini request, admitted once an in-flight slot is free"""
+        async with self._in_flight:
+            return await self._get_model(system).generate_content_async(
+                prompt,
+                generation_config=generation_config,
+                stream=stream
+            )
+    
     async def generate_response(self, prompt: str, 
                               temperature: float = None,
-                              max_tokens: int = None) -> str:
-        """Generate response from LLM"""
+                              max_tokens: int = None,
+                              system: Optional[str] = None,
+                              cached_context: Optional[str] = None,
+                              reuse_response: bool = False) -> str:
+        """
+        Generate response from LLM
         
-        generation_config = genai.types.GenerationConfig(
-            temperature=temperature or Config.TEMPERATURE,
-            max_output_tokens=max_tokens or Config.MAX_TOKENS,
-        )
+        Args:
+            prompt: The per-call user turn
+            system: Stable system instruction, sent separately so the provider
+                can reuse its cached prefix
+            cached_context: Deterministic context block placed ahead of the
+                prompt; must not contain per-call values such as timestamps
+            reuse_response: Serve an identical recent request from the local
+                response cache instead of generating again
+        """
+        
+        if cached_context:
+            prompt = f"Context: {cached_context}\n\nTask: {prompt}"
+        
+        if temperature is None:
+            temperature = Config.TEMPERATURE
+        max_tokens = max_tokens or Config.MAX_TOKENS
+        generation_config = _generation_config(temperature, max_tokens)
+        
+        cache_key = None
+        if reuse_response:
+            cache_key = f"{temperature}\0{max_tokens}\0{system or ''}\0{prompt}"
+            cached = self._response_cache.get(cache_key)
+            if cached is not None:
+                return cached
         
         try:
-            response = await self.model.generate_content_async(
-                prompt,
-                generation_config=generation_config
-            )
+            response = await self._generate(system, prompt, generation_config)
             
             if response.candidates:
-                return response.candidates[0].content.parts[0].text
+                text = response.candidates[0].content.parts[0].text
+                if cache_key is not None:
+                    self._response_cache.set(cache_key, text)
+                return text
             else:
                 logger.warning("No candidates in LLM response")
                 return "I'm having trouble generating a response right now. Please try again."
@@ -45,6 +127,61 @@ class LLMService:
             logger.error(f"LLM generation failed: {e}")
             raise Exception(f"Failed to generate response: {str(e)}")
     
+    async def generate_response_stream(self, prompt: str,
+                                       temperature: float = None,
+                                       max_tokens: int = None,
+                                       system: Optional[str] = None,
+                                       cached_context: Optional[str] = None) -> AsyncIterator[str]:
+        """Yield the response text in chunks as Gemini generates it; arguments as for generate_response"""
+        
+        if cached_context:
+            prompt = f"Context: {cached_context}\n\nTask: {prompt}"
+        
+        generation_config = _generation_config(
+            Config.TEMPERATURE if temperature is None else temperature,
+            max_tokens or Config.MAX_TOKENS
+        )
+        
+        try:
+            response = await self._generate(system, prompt, generation_config, stream=True)
+            
+            async for chunk in response:
+                try:
+                    text = chunk.text
+                except ValueError:
+                    # Chunk without text parts (e.g. only finish metadata)
+                    continue
+                if text:
+                    yield text
+                    
+        except Exception as e:
+            logger.error(f"LLM streaming failed: {e}")
+            raise Exception(f"Failed to stream response: {str(e)}")
+    
+    async def generate_structured(self, prompt: str, 
+                                  schema: Type[BaseModel],
+                                  system: Optional[str] = None,
+                                  cached_context: Optional[str] = None) -> Dict[str, Any]:
+        """Generate a response constrained to a pydantic schema via Gemini's JSON mode"""
+        
+        if cached_context:
+            prompt = f"Context: {cached_context}\n\nTask: {prompt}"
+        
+        generation_config = _generation_config(Config.TEMPERATURE, Config.MAX_TOKENS, schema)
+        
+        try:
+            response = await self._generate(system, prompt, generation_config)
+            
+            if not response.candidates:
+                raise ValueError("No candidates in LLM response")
+            
+            text = response.candidates[0].content.parts[0].text
+            return schema.model_validate_json(text).model_dump()
+            
+        except Exception as e:
+            logger.error(f"Structured LLM generation failed: {e}")
+            raise Exception(f"Failed to generate structured response: {str(e)}")
+    
     async def generate_structured_response(self, prompt: str, 
                                          schema: Dict[str, Any]) -> Dict[str, Any]:
         """Generate structured response based on schema"""
@@ -58,23 +195,37 @@ class LLMService:
         Ensure your response is valid JSON that matches the schema exactly.
         """
         
+        response = await self.generate_response(structured_prompt)
         try:
-            response = await self.generate_response(structured_prompt)
-            # Try to parse as JSON
-            import json
-            return json.loads(response)
-        except json.JSONDecodeError:
+            return orjson.loads(_JSON_FENCE.sub("", response.strip()))
+        except orjson.JSONDecodeError:
             logger.warning("Failed to parse structured response as JSON")
             # Return fallback structure
             return {"content": response, "error": "Failed to parse as structured response"}
     
-    def validate_api_key(self) -> bool:
+    async def _run_blocking(self, func, *args, **kwargs):
+        """Run a synchronous SDK call on the executor so it does not block the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+    
+    async def validate_api_key(self) -> bool:
         """Validate that API key is working"""
         try:
             # Simple test generation
             test_prompt = "Say 'API key is working' if you can respond."
-            response = self.model.generate_content(test_prompt)
+            response = await self._run_blocking(self.model.generate_content, test_prompt)
             return bool(response.candidates)
         except Exception as e:
             logger.error(f"API key validation failed: {e}")
-            return False
\ No newline at end of file
+            return False
+
+@lru_cache(maxsize=None)
+def get_llm_service() -> LLMService:
+    """
+    Application-wide LLMService, usable as a FastAPI dependency
+    
+    genai.configure() replaces the SDK's clients, so constructing a service
+    per request would drop the long-lived gRPC channel that multiplexes
+    concurrent Gemini calls over one HTTP/2 connection.
+    """
+    return LLMService()
@@ -0,0 +1,155 @@
+"""Debate session persistence for the API process"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+import os
+import time
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# Sessions expire after this many seconds without activity
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", "3600"))
+
+class InMemorySessionStore:
+    """Process-local session store; the default when no Redis URL is configured.
+
+    The session state (including its bounded live message window) is stored
+    as one record, and the full transcript in a separate append-only list so
+    callers never rewrite the whole history on a turn.
+    """
+
+    def __init__(self, ttl: int = SESSION_TTL_SECONDS):
+        self.ttl = ttl
+        self._sessions: Dict[str, Tuple[Dict[str, Any], List[Dict], float]] = {}
+
+    async def create(self, state: Dict[str, Any]) -> None:
+        """Store a new session; its initial messages start the transcript"""
+        self._purge_expired()
+        self._sessions[state["session_id"]] = (
+            self._copy(state), list(state.get("messages", [])), self._deadline()
+        )
+
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the session state"""
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return None
+        if entry[2] < time.monotonic():
+            del self._sessions[session_id]
+            return None
+        return self._copy(entry[0])
+
+    async def save(self, state: Dict[str, Any]) -> None:
+        """Persist the session state; transcript entries go through append_messages"""
+        entry = self._sessions.get(state["session_id"])
+        if entry is None:
+            await self.create(state)
+            return
+        self._sessions[state["session_id"]] = (self._copy(state), entry[1], self._deadline())
+
+    async def append_messages(self, session_id: str, *messages: Dict[str, Any]) -> None:
+        """Add messages to the session's full transcript"""
+        entry = self._sessions.get(session_id)
+        if entry is not None:
+            entry[1].extend(messages)
+
+    async def history(self, session_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Full transcript of the session, or None if it does not exist"""
+        entry = self._sessions.get(session_id)
+        return list(entry[1]) if entry else None
+
+    @staticmethod
+    def _copy(state: Dict[str, Any]) -> Dict[str, Any]:
+        return {**state, "messages": list(state.get("messages", []))}
+
+    def _deadline(self) -> float:
+        return time.monotonic() + self.ttl
+
+    def _purge_expired(self) -> None:
+        now = time.monotonic()
+        expired = [sid for sid, entry in self._sessions.items() if entry[2] < now]
+        for sid in expired:
+            del self._sessions[sid]
+
+class RedisSessionStore:
+    """Redis-backed session store shared by every API worker.
+
+    Each session is a hash of JSON-encoded state fields plus a transcript
+    list of JSON-encoded messages, both expiring after ``ttl`` seconds of
+    inactivity.
+    """
+
+    def __init__(self, url: str, ttl: int = SESSION_TTL_SECONDS):
+        import redis.asyncio as redis
+
+        self.ttl = ttl
+        self._redis = redis.from_url(url, decode_responses=True)
+
+    @staticmethod
+    def _keys(session_id: str) -> Tuple[str, str]:
+        return f"session:{session_id}", f"session:{session_id}:messages"
+
+    async def create(self, state: Dict[str, Any]) -> None:
+        """Store a new session; its initial messages start the transcript"""
+        fields_key, messages_key = self._keys(state["session_id"])
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.delete(messages_key)
+            pipe.hset(fields_key, mapping=self._encode_fields(state))
+            messages = state.get("messages", [])
+            if messages:
+                pipe.rpush(messages_key, *(orjson.dumps(msg) for msg in messages))
+            pipe.expire(fields_key, self.ttl)
+            pipe.expire(messages_key, self.ttl)
+            await pipe.execute()
+
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Return the session state"""
+        fields_key, _ = self._keys(session_id)
+        fields = await self._redis.hgetall(fields_key)
+        if not fields:
+            return None
+        return {k: orjson.loads(v) for k, v in fields.items()}
+
+    async def save(self, state: Dict[str, Any]) -> None:
+        """Persist the session state; transcript entries go through append_messages"""
+        fields_key, messages_key = self._keys(state["session_id"])
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hset(fields_key, mapping=self._encode_fields(state))
+            pipe.expire(fields_key, self.ttl)
+            pipe.expire(messages_key, self.ttl)
+            await pipe.execute()
+
+    async def append_messages(self, session_id: str, *messages: Dict[str, Any]) -> None:
+        """Add messages to the session's full transcript"""
+        if not messages:
+            return
+        _, messages_key = self._keys(session_id)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.rpush(messages_key, *(orjson.dumps(msg) for msg in messages))
+            pipe.expire(messages_key, self.ttl)
+            await pipe.execute()
+
+    async def history(self, session_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Full transcript of the session, or None if it does not exist"""
+        fields_key, messages_key = self._keys(session_id)
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.exists(fields_key)
+            pipe.lrange(messages_key, 0, -1)
+            exists, messages = await pipe.execute()
+        if not exists:
+            return None
+        return [orjson.loads(msg) for msg in messages]
+
+    @staticmethod
+    def _encode_fields(state: Dict[str, Any]) -> Dict[str, bytes]:
+        return {k: orjson.dumps(v) for k, v in state.items()}
+
+def create_session_store():
+    """Redis store when REDIS_URL is set, otherwise an in-process store"""
+    url = os.getenv("REDIS_URL")
+    if url:
+        logger.info("Using Redis session store")
+        return RedisSessionStore(url)
+    return InMemorySessionStore()
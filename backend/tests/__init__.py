@@ -0,0 +1,4 @@
+import os
+
+# Config validates the key on import; tests never reach Gemini
+os.environ.setdefault("GEMINI_API_KEY", "test")
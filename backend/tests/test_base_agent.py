@@ -0,0 +1,34 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from agents import base_agent
+from agents.moderator_agent import ModeratorAgent
+
+class StubLLM:
+    async def generate_response(self, prompt, **kwargs):
+        return "fresh"
+
+class CacheHitTest(unittest.IsolatedAsyncioTestCase):
+    async def test_cache_hits_are_flagged_from_concurrent_calls(self):
+        agent = ModeratorAgent(StubLLM())
+        context = {"topic": "T", "phase": "setup"}
+
+        async def cached_get(namespace, text):
+            return "cached" if text == "hit" else None
+
+        with mock.patch.object(base_agent._response_cache, "get", side_effect=cached_get), \
+                mock.patch.object(base_agent._response_cache, "set"):
+            results = await asyncio.gather(
+                agent._call_llm("hit", context),
+                agent._call_llm("miss", context)
+            )
+
+        self.assertEqual(results, [("cached", True), ("fresh", False)])
+        flagged = agent._format_response("cached", confidence=0.9, cached=True)
+        self.assertTrue(flagged.metadata["cached"])
+        self.assertLess(flagged.confidence, 0.9)
+        self.assertNotIn("cached", agent._format_response("fresh").metadata)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+from unittest import mock
+
+import main
+
+class GenerateEvaluationTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.state = {
+            "session_id": "s1",
+            "topic": "Remote work is better than office work",
+            "user_position": "for",
+            "ai_position": "against",
+            "phase": "complete",
+            "current_round": 1,
+            "messages": [{"role": "user", "content": "I support it", "timestamp": 1}],
+            "evaluation": {"status": "pending", "started_at": 0}
+        }
+        await main.session_store.create(self.state)
+
+    async def test_llm_failure_marks_evaluation_failed(self):
+        with mock.patch.object(main, "_generate", side_effect=RuntimeError("quota exceeded")):
+            await main.generate_evaluation("s1", self.state)
+
+        stored = await main.session_store.get("s1")
+        self.assertEqual(stored["evaluation"]["status"], "failed")
+        self.assertIn("quota exceeded", stored["evaluation"]["error"])
+
+    async def test_empty_section_marks_evaluation_failed(self):
+        with mock.patch.object(main, "_generate", return_value=None):
+            await main.generate_evaluation("s1", self.state)
+
+        stored = await main.session_store.get("s1")
+        self.assertEqual(stored["evaluation"]["status"], "failed")
+
+    async def test_sections_are_joined_when_complete(self):
+        with mock.patch.object(main, "_generate", return_value="Well argued."):
+            await main.generate_evaluation("s1", self.state)
+
+        stored = await main.session_store.get("s1")
+        self.assertEqual(stored["evaluation"]["status"], "complete")
+        self.assertIn("**Overall Summary**\nWell argued.", stored["evaluation"]["content"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,28 @@
+import time
+import unittest
+from datetime import datetime
+
+import main
+
+class PublicMessagesTest(unittest.TestCase):
+    def test_timestamps_are_serialized_as_iso_8601(self):
+        ns = time.time_ns()
+        state = {"session_id": "s1", "messages": [{"role": "user", "content": "hi", "timestamp": ns}]}
+
+        public = main.public_state(state)
+
+        timestamp = public["messages"][0]["timestamp"]
+        self.assertEqual(datetime.fromisoformat(timestamp), datetime.fromtimestamp(ns / 1e9))
+        # The stored message keeps its raw value
+        self.assertEqual(state["messages"][0]["timestamp"], ns)
+
+    def test_iso_timestamps_pass_through(self):
+        msg = {"role": "ai", "content": "hello", "timestamp": "2024-01-01T12:00:00"}
+        self.assertEqual(main.public_messages([msg]), [msg])
+
+    def test_debate_responses_leave_out_messages(self):
+        state = {"session_id": "s1", "messages": []}
+        self.assertNotIn("messages", main.public_state(state, with_messages=False))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+from agents import topic_generator
+from agents.topic_generator import TopicGeneratorAgent
+
+class CountingLLM:
+    """Returns a new topic on every call"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_response(self, prompt, **kwargs):
+        self.calls += 1
+        return f"Topic {self.calls}"
+
+class TopicGeneratorTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        topic_generator._topic_pool.clear()
+        topic_generator._refill_tasks.clear()
+
+    async def asyncTearDown(self):
+        for task in topic_generator._refill_tasks.values():
+            task.cancel()
+        topic_generator._refill_tasks.clear()
+        topic_generator._topic_pool.clear()
+
+    async def test_empty_pool_generates_distinct_topics(self):
+        agent = TopicGeneratorAgent(CountingLLM())
+        # Keep the background refill from filling the pool between calls
+        agent._schedule_refill = lambda key, topic_request: None
+        context = {"topic_request": {"category": "tech", "difficulty": "moderate"}}
+
+        first = await agent.execute("Generate a debate topic", context)
+        second = await agent.execute("Generate a debate topic", context)
+
+        self.assertFalse(first.metadata["pooled"])
+        self.assertFalse(second.metadata["pooled"])
+        self.assertNotEqual(first.content, second.content)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -22,16 +22,31 @@ class Config:
     DEFAULT_MODEL: str = "gemini-1.5-flash"
     MAX_TOKENS: int = 1000
     TEMPERATURE: float = 0.7
+    LLM_MAX_WORKERS: int = 8  # Threads for blocking SDK calls
+    LLM_MAX_IN_FLIGHT: int = int(os.getenv("LLM_MAX_IN_FLIGHT", "16"))  # Concurrent Gemini requests across sessions
+    # Completions of calls that opt into reuse (see LLMService.generate_response)
+    RESPONSE_CACHE_SIZE: int = 512
+    RESPONSE_CACHE_TTL: int = 3600
     
     # Debate Configuration
     MAX_ROUNDS: int = 5
     MIN_ARGUMENT_LENGTH: int = 50
     MAX_ARGUMENT_LENGTH: int = 500
     
+    # Orchestration Configuration
+    SPECULATION_MIN_CONFIDENCE: float = 0.9  # Fallback confidence needed to dispatch speculatively
+    MAX_SPECULATIVE_CALLS: int = 4
+    MAX_CONCURRENT_AGENT_CALLS: int = 5
+    
     # Memory Configuration
     MAX_MEMORY_SIZE: int = 100  # Number of conversations to keep
     EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
     
+    # Cache Configuration
+    SEMANTIC_CACHE_THRESHOLD: float = 0.85
+    SEMANTIC_CACHE_SIZE: int = 256  # Number of (role, context) namespaces to keep
+    SEMANTIC_CACHE_CONFIDENCE_PENALTY: float = 0.1
+    
     @classmethod
     def validate(cls) -> bool:
         """Validate required configuration"""
@@ -0,0 +1,53 @@
+"""Stance detection for the user's setup messages"""
+
+import re
+from typing import Optional
+
+# Keyword pattern -> stance the user is taking when they use it. Verb stems
+# take any suffix ("supporting", "opposed"); short words must match whole.
+POSITION_KEYWORDS = {
+    r"support\w*": "for",
+    r"agree\w*": "for",
+    r"for": "for",
+    r"yes": "for",
+    r"favou?r\w*": "for",
+    r"oppos\w*": "against",
+    r"disagree\w*": "against",
+    r"against": "against",
+    r"no": "against",
+}
+
+def _alternation(stance: str) -> str:
+    return "|".join(pattern for pattern, value in POSITION_KEYWORDS.items() if value == stance)
+
+# One case-insensitive pass scans the message for every keyword; the named
+# group that matched gives the stance. Leading word boundaries keep
+# "disagree" from matching "agree" and "know" from "no".
+_POSITION_PATTERN = re.compile(
+    rf"\b(?:(?P<for>{_alternation('for')})|(?P<against>{_alternation('against')}))\b",
+    re.IGNORECASE
+)
+
+def detect_position(message: str) -> Optional[str]:
+    """
+    User's stance from a setup message, "for" taking precedence
+    
+    >>> detect_position("I am supporting this")
+    'for'
+    >>> detect_position("I agreed")
+    'for'
+    >>> detect_position("I am opposed to it")
+    'against'
+    >>> detect_position("Opposing")
+    'against'
+    >>> detect_position("I disagree")
+    'against'
+    >>> detect_position("I don't know") is None
+    True
+    """
+    position = None
+    for match in _POSITION_PATTERN.finditer(message):
+        position = match.lastgroup
+        if position == "for":
+            break
+    return position
@@ -103,6 +103,19 @@ class DebateApp {
         });
     }
     
+    /**
+     * Update the local debate state from an API result. Responses carry only
+     * the turn's new messages, which are appended to the ones kept here.
+     */
+    applyState(result) {
+        const messages = this.currentState ? this.currentState.messages : [];
+        this.currentState = {
+            ...result.current_state,
+            messages: messages.concat(result.new_messages || [])
+        };
+        return this.currentState;
+    }
+    
     async startNewDebate() {
         const category = document.getElementById('topicSelect').value;
         const difficulty = document.getElementById('difficultySelect').value;
@@ -121,13 +134,14 @@ class DebateApp {
             
             if (result.success) {
                 this.currentSessionId = result.session_id;
-                this.currentState = result.current_state;
+                this.currentState = null;
+                this.applyState(result);
                 
                 // Switch to chat interface
                 this.ui.switchToChat();
                 
                 // Update UI with initial state
-                this.ui.updateDebateState(result.current_state);
+                this.ui.updateDebateState(this.currentState);
                 
                 // Add initial AI message
                 if (result.ai_response) {
@@ -182,10 +196,10 @@ class DebateApp {
             const result = await this.debate.continueDebate(this.currentSessionId, message);
             
             if (result.success) {
-                this.currentState = result.current_state;
+                this.applyState(result);
                 
                 // Update UI state
-                this.ui.updateDebateState(result.current_state);
+                this.ui.updateDebateState(this.currentState);
                 
                 // Add AI response
                 if (result.ai_response) {
@@ -231,6 +245,10 @@ class DebateApp {
                 "Please provide coaching tips for improving my debate performance"
             );
             
+            if (result.success) {
+                this.applyState(result);
+            }
+            
             if (result.success && result.ai_response) {
                 this.ui.addMessage({
                     role: 'ai',
@@ -264,11 +282,14 @@ class DebateApp {
             const result = await this.debate.endDebate(this.currentSessionId);
             
             if (result.success) {
-                this.currentState = result.current_state;
+                this.applyState(result);
+                
+                // The evaluation is generated in the background
+                const evaluation = await this.debate.waitForEvaluation(this.currentSessionId);
                 
                 // Show evaluation in modal
-                if (result.ai_response) {
-                    this.ui.showEvaluation(result.ai_response.content);
+                if (evaluation.ai_response) {
+                    this.ui.showEvaluation(evaluation.ai_response.content);
                 }
                 
                 this.ui.showToast('Debate ended. Evaluation ready!', 'success');
@@ -311,6 +332,10 @@ class DebateApp {
             
             const result = await this.debate.continueDebate(this.currentSessionId, message);
             
+            if (result.success) {
+                this.applyState(result);
+            }
+            
             if (result.success && result.ai_response) {
                 this.ui.addMessage({
                     role: 'ai',
@@ -125,6 +125,38 @@ class DebateManager {
         }
     }
     
+    /**
+     * Wait for a session's background evaluation to finish, giving up after maxAttempts polls
+     */
+    async waitForEvaluation(sessionId, intervalMs = 1500, maxAttempts = 120) {
+        try {
+            for (let attempt = 0; attempt < maxAttempts; attempt++) {
+                const response = await fetch(`${this.apiUrl}/session/${sessionId}/evaluation`);
+                
+                if (!response.ok) {
+                    const error = await response.json();
+                    throw new Error(error.detail || `HTTP ${response.status}`);
+                }
+                
+                const result = await response.json();
+                if (result.status === 'complete') {
+                    return result;
+                }
+                if (result.status === 'failed') {
+                    throw new Error(result.error || 'Evaluation failed');
+                }
+                
+                await new Promise(resolve => setTimeout(resolve, intervalMs));
+            }
+            
+            throw new Error('Timed out waiting for the evaluation');
+            
+        } catch (error) {
+            console.error('Get evaluation error:', error);
+            throw error;
+        }
+    }
+    
     /**
      * Delete a session
      */